@@ -1,4 +1,4 @@
-from nps_common import NPSCommon
+from nps_common import NPSCommon, child_seed, weighted_quantile
 from demographic_module import DemographicModule
 from economic_module import EconomicModule
 from finance_module import FinanceModule, SubscriberModule, BenefitModule
@@ -12,6 +12,8 @@ from visualization import (
     create_stochastic_demographic_plots,
 )
 from datetime import datetime
+from scipy.stats import t as student_t
+import numpy as np
 import pandas as pd
 
 import matplotlib.font_manager as fm
@@ -42,10 +44,31 @@ class NationalPensionModel:
         expected_returns=None,
         stochastic=False,
         simulation_number=100,
+        stochastic_mortality=False,
+        stochastic_economy=False,
+        seed=None,
+        variance_reduction=None,
+        control_variate=False,
+        importance_tilt=0.0,
+        importance_end_year=None,
+        return_model="normal",
+        return_model_params=None,
+        historical_returns=None,
     ):
         self.start_year = 2023  # 고정해야함 초기값등
         self.end_year = 2093
 
+        # 확률적 시뮬레이션에서 경로별 리-카터 사망률(장수위험)도 함께 추출
+        self.stochastic_mortality = stochastic_mortality
+        # 확률적 시뮬레이션에서 물가/임금/GDP를 투자수익률 충격과 상관된 경로로 함께 추출
+        # (과거 수익률 표의 bootstrap 모형에는 거시변수를 연결할 충격이 없음)
+        if stochastic_economy and return_model == "bootstrap":
+            raise ValueError("bootstrap 모형에는 경제 시나리오를 쓸 수 없습니다")
+        self.stochastic_economy = stochastic_economy
+
+        # 재현 가능한 난수: 수익률/경제 시나리오/사망률이 각자 독립 하위 난수열 사용
+        self.seed_sequence = np.random.SeedSequence(seed)
+
         self.common = NPSCommon()
 
         self.demographic = DemographicModule()  # 인구모듈
@@ -60,24 +83,29 @@ class NationalPensionModel:
             expected_returns_scenario=expected_returns,
             stochastic=stochastic,
             simulation_number=simulation_number,
+            seed=child_seed(self.seed_sequence, 0),
+            variance_reduction=variance_reduction,
+            control_variate=control_variate,
+            importance_tilt=importance_tilt,
+            importance_end_year=importance_end_year,
+            return_model=return_model,
+            return_model_params=return_model_params,
+            historical_returns=historical_returns,
         )
 
         self.finance = FinanceModule(self.common, self.investment)
 
     def run_projection(self):
         if not self.investment.stochastic:
-            # 기존 deterministic 방식
-            self.finance = FinanceModule(self.common, self.investment)
-            results = []
+            # 기존 deterministic 방식 (finance.project_horizon은 적립금 상태를 바꾸지 않음)
             demographic_results = []  # 인구지표 저장용
+            total_income_real = []
+            total_benefits_real = []
 
             for year in range(self.start_year, self.end_year + 1):
                 # 인구추계
                 population_data = self.demographic.project_population(year)
 
-                # 거시경제변수 추계
-                economic_vars = self.economic.project_variables(year)
-
                 # 가입자 추계
                 subscribers = self.subscriber.project_subscribers(
                     year, population_data["population_structure"]
@@ -102,94 +130,485 @@ class NationalPensionModel:
                     subscribers,
                 )
 
-                # 재정수지 추계
-                financial_status = self.finance.project_balance(
-                    year, subscribers, benefits, economic_vars
-                )
-                # 연도별 계산결과 저장
-                results.append(financial_status)
+                total_income_real.append(subscribers["total_income_real"])
+                total_benefits_real.append(benefits["total_benefits_real"])
+
+            # 거시경제변수와 재정수지는 전체 추계기간 배열로 한 번에 추계
+            economic_vars = self.economic.project_horizon(self.end_year)
+            financial_status = self.finance.project_horizon(
+                economic_vars["year"],
+                total_income_real,
+                total_benefits_real,
+                real_gdp=economic_vars["real_gdp"],
+                nominal_gdp=economic_vars["nominal_gdp"],
+            )
 
             return {
-                "financial_results": results,
+                "financial_results": to_records(financial_status),
                 "demographic_results": demographic_results,
             }
         else:
-            # 확률적 시뮬레이션 방식
-            # 시뮬레이션 결과를 저장할 리스트
-            stochastic_results = []
-            demographic_results = []  # 인구지표는 한 번만 계산
-
-            # 먼저 인구, 경제변수, 가입자 데이터 계산 (시뮬레이션에서 공통으로 사용)
-            population_data_by_year = {}
-            economic_vars_by_year = {}
-            subscribers_by_year = {}
-            benefits_by_year = {}
-
-            # 공통 데이터 계산
-            for year in range(self.start_year, self.end_year + 1):
-                population_data = self.demographic.project_population(year)
-                population_data_by_year[year] = population_data
+            # 확률적 시뮬레이션 방식: 모든 경로의 적립금을 배열로 함께 전진
+            n_sims = self.investment.simulation_number
+            demographic_results, stochastic_results, real_return = self._simulate_paths(
+                n_sims
+            )
 
-                economic_vars = self.economic.project_variables(year)
-                economic_vars_by_year[year] = economic_vars
+            return {
+                "financial_results": stochastic_results,
+                "demographic_results": demographic_results,
+                "estimates": self._estimate_statistics(
+                    stochastic_results["year"],
+                    stochastic_results,
+                    real_return,
+                    stochastic_results["likelihood_ratio"],
+                ),
+            }
 
-                subscribers = self.subscriber.project_subscribers(
-                    year, population_data["population_structure"]
+    def run_adaptive(
+        self,
+        tolerances,
+        batch_size=1000,
+        max_sims=100000,
+        min_batches=3,
+        reserve_year=None,
+        depletion_before=None,
+        confidence=0.95,
+    ):
+        """목표 신뢰구간 반폭에 도달할 때까지 경로를 묶음으로 늘리는 확률적 추계
+
+        tolerances: {통계량: 신뢰구간 반폭}, 통계량은 아래 중 필요한 것만
+            median_depletion_year: 소진연도 중앙값 (소진되지 않으면 마지막 연도 + 1)
+            reserve_p5: reserve_year 명목 적립금의 하위 5% (없으면 첫 묶음의
+                적립금 중앙값이 가장 큰 연도)
+            depletion_probability: depletion_before년 이전 소진 확률
+        batch_size개씩 경로를 추가하고, 통계량은 지금까지의 전체 경로(우도비 가중)로,
+        표준오차는 묶음별 추정치의 표준편차 / sqrt(묶음 수)(batch means)로 계산한다.
+        반폭은 (묶음 수 - 1) 자유도 t분포의 confidence 분위수 x 표준오차이며,
+        min_batches 이후 모든 통계량의 반폭이 tolerance 이하가 되거나
+        max_sims에 도달하면 멈춘다. 묶음 추정치가 모두 같아 표준오차가 0이면
+        (정수값인 소진연도 중앙값 등) 정밀도를 알 수 없으므로 수렴으로 보지 않는다. 첫 묶음은 같은 seed로
+        simulation_number=batch_size인 run_projection과 같은 경로다.
+
+        반환값: financial_results/demographic_results(run_projection 형식),
+        statistics({통계량: estimate, standard_error, half_width, tolerance}),
+        n_sims(사용한 경로 수), converged(목표 도달 여부)
+        """
+        unknown = set(tolerances) - set(ADAPTIVE_STATISTICS)
+        if unknown:
+            raise ValueError(f"지원하지 않는 통계량입니다: {sorted(unknown)}")
+        if "depletion_probability" in tolerances and depletion_before is None:
+            raise ValueError("depletion_probability에는 depletion_before가 필요합니다")
+
+        batches = []
+        measures = []
+        batch_estimates = []
+        while True:
+            n_done = len(batches) * batch_size
+            batch_key = (len(batches),) if batches else ()
+            demographic_results, results, _ = self._simulate_paths(
+                batch_size, n_done, batch_key
+            )
+            batches.append(results)
+            if reserve_year is None:
+                median = weighted_quantile(
+                    results["nominal_reserve_fund"], 0.5, results["likelihood_ratio"]
                 )
-                subscribers_by_year[year] = subscribers
+                reserve_year = results["year"][median.argmax()]
+
+            # 경로별 소진연도/적립금/가중치만 모아 전체 추정치를 다시 계산
+            measures.append(_path_measures(results, reserve_year))
+            batch_estimates.append(
+                _path_statistics(measures[-1], tolerances, depletion_before)
+            )
+            estimates = _path_statistics(
+                _concatenate_paths(measures), tolerances, depletion_before
+            )
+
+            statistics = {}
+            quantile = (
+                student_t.ppf(0.5 + confidence / 2, len(batches) - 1)
+                if len(batches) > 1
+                else np.nan
+            )
+            for name, tolerance in tolerances.items():
+                if len(batches) < 2:
+                    standard_error = np.nan
+                else:
+                    values = [estimate[name] for estimate in batch_estimates]
+                    standard_error = np.std(values, ddof=1) / np.sqrt(len(values))
+                statistics[name] = {
+                    "estimate": estimates[name],
+                    "standard_error": standard_error,
+                    "half_width": quantile * standard_error,
+                    "tolerance": tolerance,
+                }
+
+            converged = len(batches) >= min_batches and all(
+                stat["standard_error"] > 0 and stat["half_width"] <= stat["tolerance"]
+                for stat in statistics.values()
+            )
+            n_sims = len(batches) * batch_size
+            if converged or n_sims + batch_size > max_sims:
+                break
+
+        return {
+            "financial_results": _concatenate_paths(batches),
+            "demographic_results": demographic_results,
+            "statistics": statistics,
+            "n_sims": n_sims,
+            "converged": converged,
+        }
+
+    def _simulate_paths(self, n_sims, start=0, batch=()):
+        """경로 start ~ start + n_sims - 1의 확률적 재정추계
+
+        batch: 경제 시나리오/사망률 난수열의 추가 키 (경로 묶음마다 다르게)
+        반환값: (인구지표, 항목별 (시뮬레이션, 연도) 행렬과 경로별 우도비,
+        (시뮬레이션, 연도) 실질투자수익률(동적 자산배분이면 None))
+        """
+        years = np.arange(self.start_year, self.end_year + 1)
+        demographic_results, total_income_real, total_benefits_real = (
+            self._liability_cash_flows(n_sims, batch)
+        )
+        economic_paths = self._economic_paths(n_sims, batch, start)
+
+        # 경로별 투자수익률 (경제 시나리오면 시나리오 물가상승률로 실질화)
+        # 동적 자산배분이면 비중이 재정상태에 따라 정해지므로 고정 비중 수익률은
+        # 뽑지 않고 적립금 재귀와 함께 계산 (real_return은 None)
+        dynamic_returns = real_return = None
+        if self.investment.allocation_rules:
+            dynamic_returns = self.investment.dynamic_returns(
+                years, n_sims, start, inflation_rate=economic_paths["inflation_rate"]
+            )
+            likelihood_ratio = dynamic_returns.likelihood_ratio
+        else:
+            returns = self.investment.sample_returns(
+                years, n_sims, start, inflation_rate=economic_paths["inflation_rate"]
+            )
+            real_return = returns["real"]
+            likelihood_ratio = returns["likelihood_ratio"]
+
+        # 재정수지 추계: 전체 경로를 연도별로 함께 전진
+        financial_status = self.finance.project_horizon(
+            years,
+            total_income_real,
+            total_benefits_real,
+            price_index=economic_paths["price_index"],
+            real_investment_return=real_return,
+            real_gdp=economic_paths["real_gdp"],
+            nominal_gdp=economic_paths["nominal_gdp"],
+            dynamic_returns=dynamic_returns,
+            real_wage_index=economic_paths["real_wage_index"],
+        )
 
-                benefits = self.benefit.project_benefits(
-                    year, population_data["population_structure"], subscribers
-                )
-                benefits_by_year[year] = benefits
-
-                # 인구지표 저장 (시뮬레이션간 공통)
-                if len(demographic_results) < self.end_year - self.start_year + 1:
-                    demographic_data = population_data["indicators"].copy()
-                    demographic_data.update(
-                        {
-                            "year": year,
-                            "total_subscribers": subscribers["total_subscribers"],
-                            "total_income_nominal": subscribers["total_income_nominal"],
-                            "total_income_real": subscribers["total_income_real"],
-                        }
-                    )
-                    demographic_results.append(demographic_data)
-
-            # 시뮬레이션 실행
-            for sim_index in range(self.investment.simulation_number):
-                # 시뮬레이션별 finance 모듈 초기화
-                if sim_index % 100 == 0:
-                    print(f"{sim_index+1}th simulations ")
-                sim_finance = FinanceModule(self.common, self.investment)
-                sim_results = []
-
-                for year in range(self.start_year, self.end_year + 1):
-                    # 저장된 데이터 사용
-                    subscribers = subscribers_by_year[year]
-                    benefits = benefits_by_year[year]
-                    economic_vars = economic_vars_by_year[year]
-
-                    # simulation_index를 전달하여 확률적 수익률 생성
-                    self.investment.get_investment_returns(
-                        year, simulation_index=sim_index
-                    )
-
-                    # 재정수지 추계
-                    financial_status = sim_finance.project_balance(
-                        year, subscribers, benefits, economic_vars
-                    )
-
-                    # 시뮬레이션 인덱스 추가
-                    financial_status["simulation"] = sim_index
-                    sim_results.append(financial_status)
-
-                stochastic_results.append(sim_results)
+        # 항목별 (시뮬레이션, 연도) 행렬과 경로별 우도비 (통계는 이 가중치로 계산)
+        stochastic_results = {
+            "year": years,
+            "simulation": start + np.arange(n_sims),
+            "likelihood_ratio": likelihood_ratio,
+        }
+        for name, values in financial_status.items():
+            if name != "year":
+                stochastic_results[name] = np.broadcast_to(values, (n_sims, len(years)))
+        return demographic_results, stochastic_results, real_return
+
+    def _estimate_statistics(
+        self, years, financial_results, real_return, likelihood_ratio
+    ):
+        """연도별 평균 적립금과 소진확률의 추정치/표준오차
+
+        중요도 표본추출이면 경로별 값 x 우도비의 평균(불편추정치)이다.
+        control_variate면 경로별 실질 누적수익률을 통제변량으로 쓴다
+        (물가가 경로별로 달라 기댓값이 정확하지 않은 경제 시나리오와
+        수익률 경로가 따로 추출되지 않는 동적 자산배분 제외).
+        """
+        weights = likelihood_ratio[:, np.newaxis]
+        control = control_mean = None
+        if (
+            self.investment.control_variate
+            and not self.stochastic_economy
+            and not self.investment.allocation_rules
+        ):
+            control, control_mean = self.investment.cumulative_return_control(
+                years, real_return
+            )
+            control = control * weights
+
+        reserves = financial_results["nominal_reserve_fund"]
+        return {
+            name: self.investment.estimate_mean(values * weights, control, control_mean)
+            for name, values in (
+                ("nominal_reserve_fund", reserves),
+                ("depletion_probability", reserves <= 0),
+            )
+        }
+
+    def run_strategies(self, strategies):
+        """여러 자산배분 전략을 같은 경로(공통난수)로 한 번에 확률적 추계
+
+        strategies: {전략 이름: 자산배분} ({자산: 비중} 또는 {연도: {자산: 비중}})
+        부채 현금흐름, 경제 시나리오, 자산별 수익률 충격은 모든 전략이 공유하고
+        전략별로는 비중 축약과 적립금 재귀만 (전략, 시뮬레이션) 배열로 함께 한다.
+        경제 시나리오를 쓰면 거시변수는 run_projection과 같은 수익률 충격에
+        연결되고 자산별 수익률은 시나리오 물가상승률로 실질화한다.
+        allocation_rules(동적 자산배분)는 적용하지 않는다.
+
+        반환값의 financial_results는 항목별 (전략, 시뮬레이션, 연도) 배열이며
+        strategy_summary로 전략 간 대응 차이를 요약할 수 있다.
+        """
+        n_sims = self.investment.simulation_number
+        years = np.arange(self.start_year, self.end_year + 1)
+        names = list(strategies)
+        demographic_results, total_income_real, total_benefits_real = (
+            self._liability_cash_flows(n_sims)
+        )
+        economic_paths = self._economic_paths(n_sims)
 
-            return {
-                "financial_results": stochastic_results,
-                "demographic_results": demographic_results,
+        returns = self.investment.sample_strategy_returns(
+            years,
+            n_sims,
+            [strategies[name] for name in names],
+            inflation_rate=economic_paths["inflation_rate"],
+        )
+        real_return = returns["real"]
+
+        financial_status = self.finance.project_horizon(
+            years,
+            total_income_real,
+            total_benefits_real,
+            price_index=economic_paths["price_index"],
+            real_investment_return=real_return,
+            real_gdp=economic_paths["real_gdp"],
+            nominal_gdp=economic_paths["nominal_gdp"],
+            real_wage_index=economic_paths["real_wage_index"],
+        )
+
+        shape = (len(names), n_sims, len(years))
+        strategy_results = {
+            "strategy": names,
+            "year": years,
+            "simulation": np.arange(n_sims),
+            "likelihood_ratio": returns["likelihood_ratio"],
+        }
+        for name, values in financial_status.items():
+            if name != "year":
+                strategy_results[name] = np.broadcast_to(values, shape)
+
+        return {
+            "financial_results": strategy_results,
+            "demographic_results": demographic_results,
+        }
+
+    def _liability_cash_flows(self, n_sims, batch=()):
+        """인구지표와 (연도,) 또는 (시뮬레이션, 연도) 실질 소득총액/급여지출
+
+        확률적 사망률을 쓰지 않으면 부채 현금흐름은 모든 경로에서 같다.
+        """
+        demographic_results = []  # 인구지표는 한 번만 계산
+        total_income_real = []
+        total_benefits_real = []
+
+        # 부채 현금흐름(가입자 소득, 급여지출) 사전 계산 (시뮬레이션에서 공통)
+        for year in range(self.start_year, self.end_year + 1):
+            population_data = self.demographic.project_population(year)
+
+            subscribers = self.subscriber.project_subscribers(
+                year, population_data["population_structure"]
+            )
+
+            benefits = self.benefit.project_benefits(
+                year, population_data["population_structure"], subscribers
+            )
+
+            # 인구지표 저장 (시뮬레이션간 공통, 결정론적 중심경로)
+            demographic_data = population_data["indicators"].copy()
+            demographic_data.update(
+                {
+                    "year": year,
+                    "total_subscribers": subscribers["total_subscribers"],
+                    "total_income_nominal": subscribers["total_income_nominal"],
+                    "total_income_real": subscribers["total_income_real"],
+                }
+            )
+            demographic_results.append(demographic_data)
+
+            total_income_real.append(subscribers["total_income_real"])
+            total_benefits_real.append(benefits["total_benefits_real"])
+
+        # 장수위험: 경로별 사망률로 가입자/급여지출을 시나리오 묶음으로 계산
+        if self.stochastic_mortality:
+            paths = self.demographic.sample_scenario_paths(
+                n_sims,
+                self.end_year,
+                seed=child_seed(self.seed_sequence, 2, *batch),
+                mortality="lee_carter",
+                stochastic_factors=("mortality",),
+            )
+            total_income_real = []
+            total_benefits_real = []
+            for year, population in self.demographic.iter_scenarios(paths):
+                subscribers = self.subscriber.project_subscribers(year, population)
+                benefits = self.benefit.project_benefits(year, population, subscribers)
+                total_income_real.append(subscribers["total_income_real"])
+                total_benefits_real.append(benefits["total_benefits_real"])
+
+        # 연도 축을 마지막으로: (연도,) 또는 (시뮬레이션, 연도)
+        total_income_real = np.moveaxis(np.array(total_income_real), 0, -1)
+        total_benefits_real = np.moveaxis(np.array(total_benefits_real), 0, -1)
+        return demographic_results, total_income_real, total_benefits_real
+
+    def _economic_paths(self, n_sims, batch=(), start=0):
+        """경제 시나리오(stochastic_economy) 또는 가정값의 물가/GDP 경로
+
+        경제 시나리오는 경로 start ~ start + n_sims - 1의 포트폴리오 수익률
+        충격(InvestmentModule.return_shocks)에 조건부로 추출하며, 물가는
+        결정론적 추계와 같은 NPSCommon 물가상승률을 중심으로 한다. 명목 GDP는
+        결정론적 추계의 GDP 디플레이터에 시나리오의 물가 충격만 더한다.
+        충격이 없으면(변동성 0) 결정론적 추계와 같은 경로가 된다.
+
+        가정값이면 price_index/inflation_rate는 None(NPSCommon 가정값 사용)이고
+        real_wage_index도 None(실질임금 충격 없음)이다.
+        """
+        economic_vars = self.economic.project_horizon(self.end_year)
+        if self.stochastic_economy:
+            years = np.arange(self.start_year, self.end_year + 1)
+            return_shocks = self.investment.return_shocks(len(years), n_sims, start)
+            scenarios = self.economic.sample_scenarios(
+                n_sims,
+                self.end_year,
+                seed=child_seed(self.seed_sequence, 1, *batch),
+                return_shocks=return_shocks,
+                inflation_rate=self.common.get_inflation_rate(years),
+            )
+            price_shock = scenarios["price_index"] / self.common.price_index(
+                self.start_year, self.end_year
+            )
+            scenarios["nominal_gdp"] = (
+                scenarios["real_gdp"]
+                * (economic_vars["nominal_gdp"] / economic_vars["real_gdp"])
+                * price_shock
+            )
+            return scenarios
+
+        return {
+            "price_index": None,
+            "inflation_rate": None,
+            "real_wage_index": None,
+            "real_gdp": economic_vars["real_gdp"],
+            "nominal_gdp": economic_vars["nominal_gdp"],
+        }
+
+
+# run_adaptive가 추적할 수 있는 통계량
+ADAPTIVE_STATISTICS = (
+    "median_depletion_year",
+    "reserve_p5",
+    "depletion_probability",
+)
+
+
+def _path_measures(results, reserve_year):
+    """(시뮬레이션, 연도) 결과 -> run_adaptive 통계량에 필요한 경로별 값"""
+    years = results["year"]
+    reserves = results["nominal_reserve_fund"]
+    depleted = reserves <= 0
+    return {
+        "depletion_year": np.where(
+            depleted.any(-1), years[depleted.argmax(-1)], years[-1] + 1
+        ),
+        "reserve": reserves[:, reserve_year - years[0]],
+        "likelihood_ratio": results["likelihood_ratio"],
+    }
+
+
+def _path_statistics(measures, names, depletion_before):
+    """경로별 값에서 run_adaptive 통계량 계산 (우도비 가중)"""
+    weights = measures["likelihood_ratio"]
+    statistics = {}
+    if "median_depletion_year" in names:
+        statistics["median_depletion_year"] = weighted_quantile(
+            measures["depletion_year"], 0.5, weights
+        )
+    if "reserve_p5" in names:
+        statistics["reserve_p5"] = weighted_quantile(measures["reserve"], 0.05, weights)
+    if "depletion_probability" in names:
+        statistics["depletion_probability"] = np.average(
+            measures["depletion_year"] < depletion_before, weights=weights
+        )
+    return statistics
+
+
+def _concatenate_paths(batches):
+    """경로 묶음별 결과를 경로축으로 이어 붙임 (year는 공통)"""
+    results = {}
+    for name in batches[0]:
+        if name == "year":
+            results[name] = batches[0][name]
+        else:
+            results[name] = np.concatenate([batch[name] for batch in batches])
+    return results
+
+
+def strategy_summary(results, baseline=0, reserve_year=None, quantile=0.05):
+    """run_strategies 결과의 전략별 요약과 기준 전략 대비 대응(paired) 차이
+
+    같은 경로끼리 비교하므로 소진연도 차이의 표준오차가 독립 실행 비교보다 작다.
+    소진되지 않은 경로의 소진연도는 추계 마지막 연도 + 1로 본다. 평균/분위수는
+    경로별 우도비(likelihood_ratio)로 가중한다.
+        depletion_probability: 추계기간 중 소진 확률
+        mean_depletion_year, depletion_year_diff(_se): 평균 소진연도와 기준 대비 차이
+        reserve_p5 등, reserve_diff_p5 등: reserve_year 실질 적립금의 분위수와
+            경로별 (전략 - 기준) 차이의 분위수 (reserve_year가 없으면 기준 전략의
+            적립금 중앙값이 가장 큰 연도)
+    """
+    financial = results["financial_results"]
+    years = financial["year"]
+    reserves = financial["real_reserve_fund"]
+    depleted = reserves <= 0
+    depletion_year = np.where(
+        depleted.any(-1), years[depleted.argmax(-1)], years[-1] + 1
+    )
+
+    weights = financial.get("likelihood_ratio", np.ones(reserves.shape[1]))
+    weights = weights / weights.sum()
+
+    if reserve_year is None:
+        median = weighted_quantile(reserves[baseline], 0.5, weights)
+        reserve_year = years[median.argmax()]
+    reserve = reserves[..., reserve_year - years[0]]
+    n_sims = len(weights)
+    label = f"p{quantile * 100:g}"
+
+    rows = []
+    for k, name in enumerate(financial["strategy"]):
+        year_diff = depletion_year[k] - depletion_year[baseline]
+        mean_diff = weights @ year_diff
+        # 가중 평균의 표준오차 (가중치가 같으면 표본표준편차 / sqrt(n))
+        diff_se = np.sqrt(
+            (weights**2 @ (year_diff - mean_diff) ** 2) * n_sims / (n_sims - 1)
+        )
+        rows.append(
+            {
+                "strategy": name,
+                "depletion_probability": weights @ depleted[k].any(-1),
+                "mean_depletion_year": weights @ depletion_year[k],
+                "depletion_year_diff": mean_diff,
+                "depletion_year_diff_se": diff_se,
+                f"reserve_{label}": weighted_quantile(reserve[k], quantile, weights),
+                f"reserve_diff_{label}": weighted_quantile(
+                    reserve[k] - reserve[baseline], quantile, weights
+                ),
             }
+        )
+    return pd.DataFrame(rows)
+
+
+def to_records(columns):
+    """항목별 연도 배열(dict) -> 연도별 결과 dict의 리스트"""
+    names = list(columns)
+    values = [np.asarray(column).tolist() for column in columns.values()]
+    return [dict(zip(names, row)) for row in zip(*values)]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+import hashlib
+import re
+from pathlib import Path
+
+import numpy as np
+
+from demographic_module import MAX_AGE, N_AGES, MALE, FEMALE
+
+DOCS_DIR = Path(__file__).resolve().parent / "docs"
+CACHE_DIR = Path(__file__).resolve().parent / "cache"
+
+CENSUS_FILE = DOCS_DIR / "총조사인구_성_연령별__20250205113042.xlsx"
+WAGE_FILE = DOCS_DIR / "근로자의_평균임금_성_사업체규모_연령별__20250205114044.xlsx"
+
+
+def load_census_population(path=CENSUS_FILE):
+    """통계청 총조사인구(성/연령별) -> (연령, 성별) 1세별 인구배열 (명)
+
+    5세 연령구간은 각 연령에 균등 배분하고, 100세이상은 최고연령계급에 넣는다.
+    합계 행(계, 85세이상, 15세미만 등)은 세부구간과 겹치므로 제외한다.
+    """
+    return _load_cached(path, "population", _parse_census_population)
+
+
+def load_average_wages(path=WAGE_FILE):
+    """고용노동부 근로자의 평균임금(성/연령별, 전체 규모) -> (연령, 성별) 월임금총액 (원)
+
+    19세이하 구간 값은 0~19세에, 60세이상 구간 값은 60세 이상에 적용한다.
+    """
+    return _load_cached(path, "wage", _parse_average_wages)
+
+
+def load_historical_returns(path, percent=False):
+    """과거 연간 자산별 수익률 표 (CSV/엑셀) -> 연도 순 DataFrame
+
+    첫 열은 연도, 나머지 열 이름은 InvestmentModule의 자산 이름
+    (domestic_stock, foreign_stock, ...)이어야 한다. percent=True면 % 단위
+    값을 소수로 바꾼다. InvestmentModule(historical_returns=...)에 넘긴다.
+    """
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        table = pd.read_excel(path, index_col=0)
+    else:
+        table = pd.read_csv(path, index_col=0)
+    table = table.sort_index().astype(float)
+    return table / 100 if percent else table
+
+
+def _load_cached(path, name, parser):
+    """엑셀 파일을 파싱한 배열을 파일 해시로 캐시한 .npz에서 읽음
+
+    같은 내용의 파일은 다시 파싱하지 않으며, 파일이 바뀌면 해시가 달라져
+    새로 파싱한다. 캐시를 쓸 수 없는 환경이면 매번 파싱한다.
+    """
+    path = Path(path)
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    cache_path = CACHE_DIR / f"{path.stem}_{digest}.npz"
+
+    if cache_path.exists():
+        with np.load(cache_path) as cached:
+            return cached[name]
+
+    values = parser(path)
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        np.savez(cache_path, **{name: values})
+    except OSError:
+        pass
+    return values
+
+
+def _read_rows(path):
+    import openpyxl  # 캐시가 있으면 불러오지 않는다
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(workbook.worksheets[0].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def _parse_age_range(label):
+    """'0~4세' -> (0, 4), '100세이상' -> (100, None), '19세이하' -> (0, 19)"""
+    label = str(label).strip()
+    if match := re.fullmatch(r"(\d+)~(\d+)세", label):
+        return int(match.group(1)), int(match.group(2))
+    if match := re.fullmatch(r"(\d+)세이상", label):
+        return int(match.group(1)), None
+    if match := re.fullmatch(r"(\d+)세이하", label):
+        return 0, int(match.group(1))
+    return None
+
+
+def _parse_census_population(path):
+    rows = _read_rows(path)
+    header = rows[1]
+    female_col = next(i for i, h in enumerate(header) if h and "여자" in h)
+    male_col = next(i for i, h in enumerate(header) if h and "남자" in h)
+
+    groups = []
+    for row in rows[2:]:
+        age_range = _parse_age_range(row[0])
+        if age_range is not None:  # 계, 15세미만 등 합계 행 제외
+            groups.append((age_range, row[male_col], row[female_col]))
+
+    def contains(outer, inner):
+        (outer_low, outer_high), (inner_low, inner_high) = outer, inner
+        outer_high = np.inf if outer_high is None else outer_high
+        inner_high = np.inf if inner_high is None else inner_high
+        return outer != inner and outer_low <= inner_low and inner_high <= outer_high
+
+    counts = np.zeros((N_AGES, 2))
+    for age_range, male, female in groups:
+        # 85세이상처럼 세부구간을 포함하는 합계 행은 건너뜀
+        if any(contains(age_range, other) for other, _, _ in groups):
+            continue
+
+        # 5세 구간은 각 연령에 균등배분, 개방구간은 최고연령계급에 배정
+        low, high = age_range
+        if high is None or low >= MAX_AGE:
+            ages = np.array([min(low, MAX_AGE)])
+        else:
+            ages = np.arange(low, min(high, MAX_AGE - 1) + 1)
+        counts[ages, MALE] += male / len(ages)
+        counts[ages, FEMALE] += female / len(ages)
+
+    return counts
+
+
+def _parse_average_wages(path):
+    rows = _read_rows(path)
+    wage_col = 3  # 월임금총액 (원)
+    sex_columns = {"남자": MALE, "여자": FEMALE}
+
+    wages = np.zeros((N_AGES, 2))
+    sex = None
+    size = None
+    for row in rows[2:]:
+        sex = row[0] or sex
+        size = row[1] or size
+        if sex not in sex_columns or size != "계":
+            continue
+
+        age_range = _parse_age_range(row[2])
+        if age_range is None:
+            continue
+        low, high = age_range
+        upper = N_AGES if high is None else high + 1
+        wages[low:upper, sex_columns[sex]] = row[wage_col]
+
+    return wages
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from scipy import sparse
+
+from nps_common import Schedule, get_schedule, params_version
 
 # 한글 폰트 설정
 plt.rcParams["font.family"] = "Malgun Gothic"  # 윈도우의 경우
@@ -8,9 +11,281 @@ plt.rcParams["font.family"] = "Malgun Gothic"  # 윈도우의 경우
 plt.rcParams["axes.unicode_minus"] = False  # 마이너스 기호 깨짐 방지
 
 
+MAX_AGE = 100  # 최고연령계급 (100세 이상)
+N_AGES = MAX_AGE + 1
+MALE, FEMALE = 0, 1
+
+
+class PopulationState:
+    """연령(0세 ~ MAX_AGE세 이상) x 성별(남, 여) 인구배열
+
+    counts[age, sex] 형태의 고정크기 배열로 인구구조를 보관한다.
+    시나리오 묶음은 counts[scenario, age, sex]처럼 앞쪽 축을 추가하며,
+    이 경우 합계값도 시나리오별 배열로 반환된다.
+    DataFrame이 필요한 경우에만 to_frame()으로 변환한다.
+    """
+
+    def __init__(self, counts):
+        self.counts = counts
+        self._age_index = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """age/male/female 컬럼의 DataFrame을 인구배열로 변환"""
+        ages = np.minimum(df["age"].to_numpy(dtype=int), MAX_AGE)
+        counts = np.zeros((N_AGES, 2))
+        np.add.at(counts[:, MALE], ages, df["male"].to_numpy(dtype=float))
+        np.add.at(counts[:, FEMALE], ages, df["female"].to_numpy(dtype=float))
+        return cls(counts)
+
+    @property
+    def male(self):
+        return self.counts[..., MALE]
+
+    @property
+    def female(self):
+        return self.counts[..., FEMALE]
+
+    @property
+    def total(self):
+        """연령별 총인구"""
+        return self.counts[..., MALE] + self.counts[..., FEMALE]
+
+    def total_population(self):
+        return self.counts.reshape(self.counts.shape[:-2] + (-1,)).sum(axis=-1)
+
+    @property
+    def age_index(self):
+        """연령누적 인구 색인 (최초 조회시 한 번만 생성)"""
+        if self._age_index is None:
+            self._age_index = AgeBandIndex(self.total)
+        return self._age_index
+
+    def band_total(self, min_age, max_age=None):
+        """min_age ~ max_age세(포함) 인구 합계, max_age가 None이면 min_age세 이상"""
+        return self.age_index.band_total(min_age, max_age)
+
+    def copy(self):
+        return PopulationState(self.counts.copy())
+
+    def to_frame(self):
+        """age/total/male/female 컬럼의 DataFrame 생성 (MAX_AGE는 MAX_AGE세 이상)"""
+        return pd.DataFrame(
+            {
+                "age": np.arange(N_AGES),
+                "total": self.total,
+                "male": self.male,
+                "female": self.female,
+            }
+        )
+
+
+class AgeBandIndex:
+    """연령별 인구의 누적합(prefix-sum) 색인
+
+    cumulative[..., a]는 a세 미만 인구의 합이므로 임의의 연령구간 합계를
+    두 번의 조회와 한 번의 뺄셈으로 계산한다.
+    """
+
+    def __init__(self, total_by_age):
+        cumulative = np.zeros(total_by_age.shape[:-1] + (N_AGES + 1,))
+        np.cumsum(total_by_age, axis=-1, out=cumulative[..., 1:])
+        self.cumulative = cumulative
+
+    def band_total(self, min_age, max_age=None):
+        """min_age ~ max_age세(포함) 인구 합계, max_age가 None이면 min_age세 이상"""
+        lower = min(max(min_age, 0), N_AGES)
+        upper = N_AGES if max_age is None else min(max(max_age + 1, 0), N_AGES)
+        return self.cumulative[..., max(upper, lower)] - self.cumulative[..., lower]
+
+
+class LeslieProjection:
+    """레슬리(Leslie) 투영행렬 기반 인구추계 엔진
+
+    코호트 요인법의 1년 전진(연령증가, 생존, 15~49세 출산, 비례 국제순이동)은
+    인구벡터(연령 x 성별을 펼친 벡터)에 대한 선형사상이므로 연도별 희소행렬
+    A(t) = m(t) * S(t) + B(t) 로 표현한다.
+        S(t): 연령증가 및 생존 (부분대각 + 최고연령계급 누적)
+        B(t): 출생 (0세 행, 가임여성 열)
+        m(t): 국제순이동 배율 1 + 순이동/전년도 총인구
+    """
+
+    def __init__(self, demographic):
+        self.demographic = demographic
+
+        size = N_AGES * 2
+        self.size = size
+
+        # 연령증가/생존 행렬 S의 위치: (a-1, s) -> (a, s), (MAX, s) -> (MAX, s)
+        ages = np.repeat(np.arange(1, N_AGES), 2)
+        sexes = np.tile([MALE, FEMALE], N_AGES - 1)
+        self._survival_rows = np.concatenate(
+            [ages * 2 + sexes, [MAX_AGE * 2 + MALE, MAX_AGE * 2 + FEMALE]]
+        )
+        self._survival_cols = np.concatenate(
+            [(ages - 1) * 2 + sexes, [MAX_AGE * 2 + MALE, MAX_AGE * 2 + FEMALE]]
+        )
+        self._survival_ages = np.concatenate([ages, [MAX_AGE, MAX_AGE]])
+        self._survival_sexes = np.concatenate([sexes, [MALE, FEMALE]])
+
+        # 출생행렬 B의 위치: 15~49세(1년 전진 후) 여성 -> 0세 남/여
+        fertile_ages = np.arange(15, 49 + 1)
+        self._fertile_ages = np.tile(fertile_ages, 2)
+        self._birth_rows = np.repeat([MALE, FEMALE], len(fertile_ages))
+        self._birth_cols = np.tile((fertile_ages - 1) * 2 + FEMALE, 2)
+
+    def matrix(self, year, migration_ratio=0.0):
+        """해당 연도의 투영행렬 A(t) (scipy.sparse CSR)"""
+        survival = self.demographic._get_survival(year)
+        fertility_rate = self.demographic.get_fertility_rate(year)
+
+        survival_values = (1 + migration_ratio) * survival[
+            self._survival_ages, self._survival_sexes
+        ]
+        birth_values = (
+            0.5 * fertility_rate / (49 - 15 + 1) * survival[self._fertile_ages, FEMALE]
+        )
+
+        return sparse.csr_matrix(
+            (
+                np.concatenate([survival_values, birth_values]),
+                (
+                    np.concatenate([self._survival_rows, self._birth_rows]),
+                    np.concatenate([self._survival_cols, self._birth_cols]),
+                ),
+            ),
+            shape=(self.size, self.size),
+        )
+
+    def step(self, counts, year):
+        """전년도 인구배열로부터 해당 연도 인구배열 계산 (희소 행렬-벡터 곱)"""
+        net_migration = self.demographic._get_net_migration(year)
+        vector = self._advance(self.matrix(year), counts.ravel(), net_migration)
+        return vector.reshape(N_AGES, 2)
+
+    def project(self, counts, start_year, end_year):
+        """start_year 인구배열에서 end_year 인구배열까지 투영
+
+        출산율/기대수명/국제순이동이 일정한 구간은 순이동 배율이 없는 행렬
+        S(t) + B(t)를 한 번만 만들고 희소 행렬-벡터 곱으로 여러 해를 전진한다.
+        국제순이동 배율은 매년 그 해 총인구로 다시 계산하므로 근사가 없고,
+        한 해씩 step한 결과와 부동소수점 오차 안에서 같다.
+        """
+        vector = counts.ravel()
+        year = start_year
+        while year < end_year:
+            span = self._constant_span(year + 1, end_year)
+            matrix = self.matrix(year + 1)
+            net_migration = self.demographic._get_net_migration(year + 1)
+            for _ in range(span):
+                vector = self._advance(matrix, vector, net_migration)
+            year += span
+
+        return vector.reshape(N_AGES, 2)
+
+    def _advance(self, matrix, vector, net_migration):
+        """인구벡터 1년 전진: S(t) + B(t)를 곱한 뒤 출생(0세) 외 행에 순이동 배율
+
+        S와 B의 행은 겹치지 않으므로 m(t) * S v + B v와 같다.
+        """
+        migration_ratio = net_migration / vector.sum()
+        vector = matrix @ vector
+        vector[2:] *= 1 + migration_ratio
+        return vector
+
+    def _constant_span(self, first_year, end_year):
+        """first_year부터 출산율/기대수명/국제순이동이 변하지 않는 연수"""
+        years = np.arange(first_year, end_year + 1)
+        fertility = self.demographic.get_fertility_rate(years)
+        life_expectancy = self.demographic.get_life_expectancy(years)
+        migration = self.demographic._get_net_migration(years)
+
+        changed = (
+            (fertility != fertility[0])
+            | (life_expectancy != life_expectancy[0])
+            | (migration != migration[0])
+        )
+        return int(np.argmax(changed)) if changed.any() else len(years)
+
+
+class LeeCarterMortality:
+    """리-카터(Lee-Carter) 확률적 사망률 모형
+
+    log m(x, t) = a(x) + b(x) * k(t)
+    중심경로는 결정론적 생존률표의 사망력 log m_det(x, t)를 그대로 쓰고,
+    사망지수 k(t)의 확률보행 편차 dk(t)만큼 연령별 민감도 b(x)로 이동시킨다.
+        log m(x, t) = log m_det(x, t) + b(x) * dk(t)
+    b(x)는 결정론적 사망력 개선의 첫 번째 특이벡터(평균 1로 정규화)이므로
+    dk는 평균적인 로그사망률 변화 단위를 갖는다.
+    """
+
+    def __init__(self, survival_table, base_year, volatility):
+        """survival_table: (연도, 연령, 성별) 생존률, volatility: dk의 연간 표준편차"""
+        self.base_year = base_year
+        self.end_year = base_year + len(survival_table) - 1
+        self.volatility = volatility
+
+        # 0세 생존률(1.0)은 사용되지 않으므로 사망력 0으로 둔다
+        hazard = -np.log(survival_table)
+        self.log_hazard = np.log(np.where(hazard > 0, hazard, 1.0))
+        self.log_hazard[:, 0, :] = -np.inf
+
+        centered = self.log_hazard[:, 1:, :].reshape(len(survival_table), -1)
+        centered = centered - centered.mean(axis=0)
+        _, singular_values, vt = np.linalg.svd(centered, full_matrices=False)
+        if singular_values[0] > 0:
+            sensitivity = vt[0] / vt[0].mean()
+        else:  # 사망률 개선이 없으면 모든 연령이 같은 폭으로 움직인다
+            sensitivity = np.ones(centered.shape[1])
+
+        self.sensitivity = np.zeros(survival_table.shape[1:])
+        self.sensitivity[1:] = sensitivity.reshape(-1, 2)
+
+    def sample_kappa(self, rng, n_paths, n_years):
+        """기준연도 0에서 출발하는 (경로, 연도) 사망지수 편차 dk의 확률보행"""
+        innovations = rng.standard_normal((n_paths, n_years)) * self.volatility
+        innovations[:, 0] = 0.0
+        return np.cumsum(innovations, axis=1)
+
+    def survival(self, year, kappa, out=None):
+        """해당 연도의 경로별 (경로, 연령, 성별) 생존률"""
+        log_hazard = self.log_hazard[year - self.base_year]
+        out = np.multiply.outer(kappa, self.sensitivity, out=out)
+        out += log_hazard
+        np.exp(out, out=out)
+        np.negative(out, out=out)
+        return np.exp(out, out=out)
+
+    def simulate_survival(self, rng, n_paths, n_years=None):
+        """(경로, 연도, 연령, 성별) 생존률 텐서를 한 번에 생성
+
+        메모리 사용량은 경로 x 연도 x 연령 x 2 x 8바이트이다.
+        """
+        if n_years is None:
+            n_years = len(self.log_hazard)
+        kappa = self.sample_kappa(rng, n_paths, n_years)
+        log_hazard = (
+            self.log_hazard[np.newaxis, :n_years]
+            + kappa[:, :, np.newaxis, np.newaxis] * self.sensitivity
+        )
+        return np.exp(-np.exp(log_hazard))
+
+
 class DemographicModule:
-    def __init__(self):
-        """인구모듈 초기화"""
+    def __init__(self, engine="cohort", survival_model="life_table"):
+        """인구모듈 초기화
+
+        engine: "cohort" (연령별 배열 갱신) 또는 "leslie" (투영행렬)
+        survival_model: "life_table" (기대수명에 맞춘 곰페르츠 생명표)
+            또는 "bucket" (5개 연령구간 고정 생존률)
+        """
+        if engine not in ("cohort", "leslie"):
+            raise ValueError(f"지원하지 않는 인구추계 엔진입니다: {engine}")
+        if survival_model not in ("life_table", "bucket"):
+            raise ValueError(f"지원하지 않는 생존률 모형입니다: {survival_model}")
+        self.engine = engine
+        self.survival_model = survival_model
+        self._leslie = LeslieProjection(self)
 
         # self.population_structure = None  # 전체 인구
         # 보고서 참조
@@ -19,32 +294,69 @@ class DemographicModule:
         self.working_age = None  # 생산가능인구 (18-64세)
         self.elderly = None  # 고령인구 (65세 이상)
 
+        self.base_year = 2023  # 기준연도 (초기 인구구조)
+
+        # 연도별 인구구조 캐시: 각 연도는 한 번만 계산하고 params 변경시 무효화
+        self._structure_cache = {}
+        self._history = np.empty((0, N_AGES, 2))  # (연도, 연령, 성별) 인구배열
+        self._survival_table = np.empty((0, N_AGES, 2))  # (연도, 연령, 성별) 생존률
+        self._lee_carter = None
+        self._cache_key = None
+
+        # 연령구간별 고정 생존률 (survival_model="bucket")
+        self._survival_by_age = self._get_survival_rates(np.arange(N_AGES))
+        self._survival_by_sex = np.repeat(self._survival_by_age[:, np.newaxis], 2, 1)
+
+        # 생명표 가정: 곰페르츠 사망력 mu(x) = a * exp(b * x)의 기울기 b와
+        # 남녀 기대수명 차이 (남 = 기대수명 - 차이/2, 여 = 기대수명 + 차이/2)
+        self.life_table_params = {
+            "gompertz_slope": 0.1,
+            "sex_gap": 5.8,  # 2023년 생명표 남 80.6세, 여 86.4세
+        }
+
         # 인구 변동요인 초기화 (중위가정 기준)
         self.params = {
-            "fertility_rate": {  # 합계출산율 보고서 p11
-                2023: 0.73,
-                2030: 0.96,
-                2040: 1.19,
-                2050: 1.21,
-                2060: 1.21,
-                2070: 1.21,
-            },
-            "life_expectancy": {  # 기대수명 보고서 p11
-                2023: 84.3,
-                2030: 85.7,
-                2040: 87.4,
-                2050: 88.9,
-                2060: 90.1,
-                2070: 91.2,
-            },
-            "net_migration": {  # 국제순이동(천명) 보고서 p11
-                2023: 43,
-                2030: 46,
-                2040: 46,
-                2050: 43,
-                2060: 43,
-                2070: 40,
-            },
+            "fertility_rate": Schedule(
+                {  # 합계출산율 보고서 p11
+                    2023: 0.73,
+                    2030: 0.96,
+                    2040: 1.19,
+                    2050: 1.21,
+                    2060: 1.21,
+                    2070: 1.21,
+                }
+            ),
+            "life_expectancy": Schedule(
+                {  # 기대수명 보고서 p11
+                    2023: 84.3,
+                    2030: 85.7,
+                    2040: 87.4,
+                    2050: 88.9,
+                    2060: 90.1,
+                    2070: 91.2,
+                }
+            ),
+            "net_migration": Schedule(
+                {  # 국제순이동(천명) 보고서 p11
+                    2023: 43,
+                    2030: 46,
+                    2040: 46,
+                    2050: 43,
+                    2060: 43,
+                    2070: 40,
+                }
+            ),
+        }
+
+        # 확률적 인구 시나리오의 변동요인 충격 (연간 AR(1) 표준편차/지속성)
+        self.scenario_params = {
+            "fertility_volatility": 0.05,  # 합계출산율 로그 충격
+            "fertility_persistence": 0.9,
+            "mortality_volatility": 0.03,  # 사망확률 로그 충격
+            "mortality_persistence": 0.9,
+            "migration_volatility": 10,  # 국제순이동 충격 (천명)
+            "migration_persistence": 0.5,
+            "lee_carter_volatility": 0.015,  # 리-카터 사망지수 연간 표준편차
         }
 
     def project_population(self, year):
@@ -55,13 +367,9 @@ class DemographicModule:
         # 2. 주요 인구지표 계산
         demographic_indicators = {
             "year": year,
-            "total_population": population_structure["total"].sum(),
-            "working_age_population": population_structure[
-                (population_structure["age"] >= 18) & (population_structure["age"] < 65)
-            ]["total"].sum(),
-            "elderly_population": population_structure[
-                population_structure["age"] >= 65
-            ]["total"].sum(),
+            "total_population": population_structure.total_population(),
+            "working_age_population": population_structure.band_total(18, 64),
+            "elderly_population": population_structure.band_total(65),
         }
         demographic_indicators["elderly_dependency"] = (
             demographic_indicators["elderly_population"]
@@ -71,72 +379,351 @@ class DemographicModule:
 
         return {
             "population_structure": population_structure,
+            "age_index": population_structure.age_index,
             "indicators": demographic_indicators,
         }
 
     def _calculate_population_structure(self, year):
         """연령별/성별 인구구조 계산 (간단한 코호트 요인법)
 
+        기준연도부터 한 해씩 전진하며 계산하고 결과를 연도별로 캐시한다.
+        이미 계산된 연도는 캐시에서 바로 반환하므로 전체 추계기간을
+        선형시간에 계산한다.
+
         TODO :  더 정교한 연령별/성별 사망률 적용
             연령별 출산율 차등 적용
             연령별/성별 국제순이동 패턴 반영
             코호트별 특성 반영
         """
-        if year == 2023:  # 기준연도는 초기 인구구조 반환
-            return self.population_structure
+        if year < self.base_year:
+            raise ValueError(
+                f"{self.base_year}년 이전 인구구조는 계산할 수 없습니다: {year}"
+            )
+
+        self._validate_cache()
+        if year in self._structure_cache:
+            return self._structure_cache[year]
+
+        # 연도별 인구배열 버퍼 확보 (부족하면 두 배로 확장)
+        n_years = year - self.base_year + 1
+        if n_years > len(self._history):
+            history = np.empty((max(n_years, 2 * len(self._history)), N_AGES, 2))
+            history[: len(self._history)] = self._history
+            self._history = history
+
+        # 캐시된 마지막 연도부터 목표연도까지 한 해씩 전진
+        last_year = max(self._structure_cache)
+        for y in range(last_year + 1, year + 1):
+            idx = y - self.base_year
+            if self.engine == "leslie":
+                self._history[idx] = self._leslie.step(self._history[idx - 1], y)
+            else:
+                self._project_next_year(self._history[idx - 1], self._history[idx], y)
+            self._structure_cache[y] = PopulationState(self._history[idx])
+
+        return self._structure_cache[year]
+
+    def jump_population_structure(self, year):
+        """가정이 일정한 구간의 투영행렬을 재사용해 year년 인구구조를 바로 계산 (장기추계용)
+
+        캐시된 마지막 연도에서 출발하며, 중간 연도는 계산/캐시하지 않는다
+        (LeslieProjection.project 참조).
+        """
+        self._validate_cache()
+        if year in self._structure_cache:
+            return self._structure_cache[year]
+
+        start_year = max(y for y in self._structure_cache if y < year)
+        counts = self._leslie.project(
+            self._structure_cache[start_year].counts, start_year, year
+        )
+        return PopulationState(counts)
+
+    def _validate_cache(self):
+        """params 또는 초기 인구구조가 바뀌었으면 캐시를 초기화"""
+        cache_key = (
+            id(self.population_structure),
+            self.survival_model,
+            params_version(self.params),
+            tuple(sorted(self.life_table_params.items())),
+        )
+        if cache_key != self._cache_key:
+            initial = self.population_structure
+            if not isinstance(initial, PopulationState):
+                initial = PopulationState.from_frame(initial)
+
+            self._history = np.empty((1, N_AGES, 2))
+            self._history[0] = initial.counts
+            self._survival_table = np.empty((0, N_AGES, 2))
+            self._lee_carter = None
+            self._structure_cache = {self.base_year: PopulationState(self._history[0])}
+            self._cache_key = cache_key
+
+    def clear_cache(self):
+        """연도별 인구구조 캐시를 강제로 비움"""
+        self._structure_cache = {}
+        self._cache_key = None
+
+    def _project_next_year(
+        self, prev, out, year, fertility_rate=None, net_migration=None, survival=None
+    ):
+        """전년도 인구배열(prev)로부터 해당 연도 인구배열(out)을 계산 (1년 전진)
+
+        prev, out: (..., 연령, 성별) 배열. out은 제자리에서 갱신된다.
+        fertility_rate, net_migration: 스칼라 또는 시나리오별 (...) 배열
+        survival: (..., 연령, 성별) 생존률 배열
+        값을 주지 않으면 params의 결정론적 가정을 사용한다.
+        """
+        if fertility_rate is None:
+            fertility_rate = self.get_fertility_rate(year)
+        if net_migration is None:
+            net_migration = self._get_net_migration(year)
+        if survival is None:
+            survival = self._get_survival(year)
 
-        # 이전 연도의 인구구조로부터 계산
-        prev_population_struct = self._calculate_population_structure(year - 1).copy()
+        prev_total = PopulationState(prev).total_population()
 
-        # 연령 증가 (모든 연령층을 1세 증가)
-        prev_population_struct["age"] += 1
+        # 연령 증가 (모든 연령층을 1세 증가, 최고연령계급은 누적)
+        out[..., 1:, :] = prev[..., :-1, :]
+        out[..., -1, :] += prev[..., -1, :]
 
-        # 사망률 적용 (간단한 연령별 사망률)
-        survival_rates = self._get_survival_rates(prev_population_struct["age"])
-        prev_population_struct["male"] *= survival_rates
-        prev_population_struct["female"] *= survival_rates
+        # 사망률 적용
+        out[..., 1:, :] *= survival[..., 1:, :]
 
         # 출생아 수 계산
-        fertility_rate = self.get_fertility_rate(year)
-        fertile_women = prev_population_struct[
-            (prev_population_struct["age"] >= 15)
-            & (prev_population_struct["age"] <= 49)
-        ]["female"].sum()
+        fertile_women = out[..., 15 : 49 + 1, FEMALE].sum(axis=-1)
 
         total_births = (
             fertile_women * fertility_rate / (49 - 15 + 1)
         )  # 합계출산율->연간 출생아수로 전환
 
-        # 출생성비 적용
-        male_births = total_births * 0.5
-        female_births = total_births * 0.5
+        # 국제순이동 반영 (간단히 전년도 전체 인구에 비례하여 배분)
+        migration_ratio = np.asarray(net_migration / prev_total)
+        out[..., 1:, :] *= (1 + migration_ratio)[..., np.newaxis, np.newaxis]
+
+        # 출생성비 적용 (신생아는 국제순이동 대상에서 제외)
+        out[..., 0, MALE] = total_births * 0.5
+        out[..., 0, FEMALE] = total_births * 0.5
+
+    def sample_scenario_paths(
+        self,
+        n_scenarios,
+        end_year,
+        seed=None,
+        mortality="multiplier",
+        stochastic_factors=("fertility", "mortality", "migration"),
+    ):
+        """인구 변동요인(출산율, 사망률, 국제순이동)의 시나리오별 경로 추출
+
+        결정론적 가정 주변에서 (시나리오, 연도) 경로를 추출한다.
+            출산율: 가정값 x exp(AR(1) 충격)
+            사망률: mortality="multiplier"이면 연령별 사망확률 x exp(AR(1) 충격),
+                mortality="lee_carter"이면 리-카터 사망지수 k(t)의 확률보행
+            국제순이동: 가정값 + AR(1) 충격 (천명)
+        stochastic_factors에 없는 요인은 결정론적 가정을 그대로 사용한다.
+        """
+        if mortality not in ("multiplier", "lee_carter"):
+            raise ValueError(f"지원하지 않는 사망률 시나리오입니다: {mortality}")
+
+        self._validate_cache()
+        years = np.arange(self.base_year, end_year + 1)
+        n_years = len(years)
+        rng = np.random.default_rng(seed)
+
+        def shocks(factor):
+            if factor not in stochastic_factors:
+                return np.zeros((n_scenarios, n_years))
+            return self._sample_ar1(rng, n_scenarios, n_years, factor)
+
+        fertility_paths = self.get_fertility_rate(years) * np.exp(shocks("fertility"))
+        if mortality == "lee_carter":
+            lee_carter = self._get_lee_carter(end_year)
+            mortality_paths = (
+                lee_carter.sample_kappa(rng, n_scenarios, n_years)
+                if "mortality" in stochastic_factors
+                else np.zeros((n_scenarios, n_years))
+            )
+        else:
+            mortality_paths = np.exp(shocks("mortality"))
+        migration_paths = self._get_net_migration(years) + shocks("migration") * 1000
+
+        return {
+            "years": years,
+            "fertility_rate": fertility_paths,
+            "mortality_model": mortality,
+            "mortality": mortality_paths,
+            "net_migration": migration_paths,
+        }
 
-        # 4. 신생아 행 추가
-        newborn_row = pd.DataFrame(
+    def iter_scenarios(self, paths):
+        """sample_scenario_paths 경로로 모든 시나리오를 한 해씩 함께 전진
+
+        (연도, PopulationState) 를 연도순으로 돌려준다. PopulationState의
+        counts는 (시나리오, 연령, 성별) 배열이며 다음 연도 계산에 재사용되므로
+        연도를 넘겨 보관하려면 copy()해야 한다.
+        """
+        self._validate_cache()
+        years = paths["years"]
+        n_scenarios = paths["fertility_rate"].shape[0]
+
+        counts = np.broadcast_to(
+            self._structure_cache[self.base_year].counts, (n_scenarios, N_AGES, 2)
+        ).copy()
+        next_counts = np.empty_like(counts)
+        survival = np.empty_like(counts)
+        if paths["mortality_model"] == "lee_carter":
+            lee_carter = self._get_lee_carter(years[-1])
+
+        for t, year in enumerate(years):
+            if t > 0:
+                if paths["mortality_model"] == "lee_carter":
+                    lee_carter.survival(year, paths["mortality"][:, t], out=survival)
+                else:
+                    np.multiply(
+                        1 - self._get_survival(year),
+                        paths["mortality"][:, t, np.newaxis, np.newaxis],
+                        out=survival,
+                    )
+                    np.minimum(survival, 1.0, out=survival)
+                    np.subtract(1.0, survival, out=survival)
+
+                self._project_next_year(
+                    counts,
+                    next_counts,
+                    year,
+                    fertility_rate=paths["fertility_rate"][:, t],
+                    net_migration=paths["net_migration"][:, t],
+                    survival=survival,
+                )
+                counts, next_counts = next_counts, counts
+
+            yield year, PopulationState(counts)
+
+    def project_scenarios(
+        self,
+        n_scenarios,
+        end_year,
+        seed=None,
+        age_bands=None,
+        keep_structures=False,
+        mortality="multiplier",
+        stochastic_factors=("fertility", "mortality", "migration"),
+    ):
+        """인구 변동요인(출산율, 사망률, 국제순이동)의 확률적 시나리오 추계
+
+        시나리오별 변동요인 경로를 추출하고(sample_scenario_paths 참조)
+        (시나리오, 연령, 성별) 인구배열을 모든 시나리오에 대해 한 번에 전진시킨다.
+
+        n_scenarios: 시나리오 수
+        end_year: 추계 종료연도
+        seed: 난수 시드
+        age_bands: 연도별로 합계를 기록할 (최소연령, 최대연령) 목록
+            (최대연령이 None이면 최소연령 이상)
+        keep_structures: True이면 연도별 PopulationState(시나리오 묶음)를 보관
+        mortality, stochastic_factors: sample_scenario_paths 참조
+
+        반환값의 연도별 지표는 모두 (시나리오, 연도) 배열이다.
+        """
+        paths = self.sample_scenario_paths(
+            n_scenarios, end_year, seed, mortality, stochastic_factors
+        )
+        n_years = len(paths["years"])
+
+        age_bands = list(age_bands) if age_bands else []
+        indicators = {
+            name: np.empty((n_scenarios, n_years))
+            for name in (
+                "total_population",
+                "working_age_population",
+                "elderly_population",
+                "elderly_dependency",
+            )
+        }
+        bands = {band: np.empty((n_scenarios, n_years)) for band in age_bands}
+        structures = []
+
+        for t, (year, state) in enumerate(self.iter_scenarios(paths)):
+            indicators["total_population"][:, t] = state.total_population()
+            indicators["working_age_population"][:, t] = state.band_total(18, 64)
+            indicators["elderly_population"][:, t] = state.band_total(65)
+            for band in age_bands:
+                bands[band][:, t] = state.band_total(*band)
+            if keep_structures:
+                structures.append(state.copy())
+
+        indicators["elderly_dependency"] = (
+            indicators["elderly_population"]
+            / indicators["working_age_population"]
+            * 100
+        )
+
+        paths.update(
             {
-                "age": [0],
-                "total": [male_births + female_births],
-                "male": [male_births],
-                "female": [female_births],
+                "population": state.counts,
+                "indicators": indicators,
+                "bands": bands,
+                "population_structures": structures,
             }
         )
+        return paths
 
-        # 5. 국제순이동 반영 (간단히 전체 인구에 비례하여 배분)
-        net_migration = self._get_net_migration(year)
-        migration_ratio = net_migration / prev_population_struct["total"].sum()
+    def _get_lee_carter(self, end_year):
+        """결정론적 생존률표에 맞춘 리-카터 사망률 모형 (캐시)
 
-        prev_population_struct["male"] *= 1 + migration_ratio
-        prev_population_struct["female"] *= 1 + migration_ratio
-
-        # 6. 최종 인구구조 생성
-        population_structure = pd.concat(
-            [newborn_row, prev_population_struct[prev_population_struct["age"] <= 200]]
-        )
-        population_structure["total"] = (
-            population_structure["male"] + population_structure["female"]
+        적합한 b(x)만 캐시하고, 사망지수 변동성은 호출할 때마다
+        scenario_params에서 다시 읽는다.
+        """
+        self._get_survival(end_year)
+        volatility = self.scenario_params["lee_carter_volatility"]
+        if self._lee_carter is None or self._lee_carter.end_year < end_year:
+            self._lee_carter = LeeCarterMortality(
+                self._survival_table[: end_year - self.base_year + 1],
+                self.base_year,
+                volatility,
+            )
+        self._lee_carter.volatility = volatility
+        return self._lee_carter
+
+    def _sample_ar1(self, rng, n_scenarios, n_years, factor):
+        """기준연도 0에서 출발하는 (시나리오, 연도) AR(1) 충격 경로"""
+        volatility = self.scenario_params[f"{factor}_volatility"]
+        persistence = self.scenario_params[f"{factor}_persistence"]
+
+        innovations = rng.standard_normal((n_scenarios, n_years)) * volatility
+        shocks = np.zeros((n_scenarios, n_years))
+        for t in range(1, n_years):
+            shocks[:, t] = persistence * shocks[:, t - 1] + innovations[:, t]
+        return shocks
+
+    def _get_survival(self, year):
+        """해당 연도의 (연령, 성별) 생존률 (1년 전진 후 연령 기준)
+
+        생존률표는 연도별로 한 번만 보정해 캐시하며, 캐시 범위를 넘는
+        연도를 요청하면 표를 확장한다. 캐시는 _validate_cache에서 초기화된다.
+        """
+        idx = year - self.base_year
+        if idx >= len(self._survival_table):
+            self._build_survival_table(max(year, self.base_year + 2 * idx))
+        return self._survival_table[idx]
+
+    def _build_survival_table(self, end_year):
+        """기준연도 ~ end_year의 (연도, 연령, 성별) 생존률표 생성"""
+        years = np.arange(self.base_year, end_year + 1)
+
+        if self.survival_model == "bucket":
+            self._survival_table = np.broadcast_to(
+                self._survival_by_sex, (len(years), N_AGES, 2)
+            )
+            return
+
+        life_expectancy = self.get_life_expectancy(years)
+        half_gap = self.life_table_params["sex_gap"] / 2
+        targets = np.stack([life_expectancy - half_gap, life_expectancy + half_gap], -1)
+
+        table = gompertz_survival_table(
+            targets, self.life_table_params["gompertz_slope"]
         )
-
-        return population_structure.reset_index(drop=True)
+        self._survival_table = np.ascontiguousarray(np.moveaxis(table, -1, -2))
 
     def _get_survival_rates(self, ages):
         """간단한 연령별 생존률 계산"""
@@ -154,28 +741,86 @@ class DemographicModule:
 
     def _get_net_migration(self, year):
         """특정 연도의 국제순이동자 수 반환"""
-        years = sorted(self.params["net_migration"].keys())
-        migration = [self.params["net_migration"][y] for y in years]
+        # 천명 단위를 명 단위로 변환
+        return get_schedule(self.params, "net_migration")(year) * 1000
 
-        return np.interp(year, years, migration) * 1000  # 천명 단위를 명 단위로 변환
+    def get_life_expectancy(self, year):
+        """특정 연도의 기대수명 반환"""
+        return get_schedule(self.params, "life_expectancy")(year)
 
     def get_fertility_rate(self, year):
         """특정 연도의 합계출산율 반환"""
         # 중간값은 선형보간
-        years = sorted(self.params["fertility_rate"].keys())
-        rates = [self.params["fertility_rate"][y] for y in years]
+        return get_schedule(self.params, "fertility_rate")(year)
+
+
+def gompertz_survival_table(life_expectancy, slope, max_age=130):
+    """기대수명에 맞춘 곰페르츠 생명표의 1년 생존률
 
-        return np.interp(year, years, rates)
+    사망력 mu(x) = a * exp(slope * x)에서 수준 a를 이분법으로 보정해
+    생명표 기대수명(0.5 + sum l_x)이 목표값과 같아지도록 한다.
+    모든 연도/성별을 한 번에 벡터 연산으로 보정한다.
 
+    life_expectancy: (...) 목표 기대수명 배열
+    반환값: (..., N_AGES) 배열, 값[a]는 a-1세 -> a세 생존률.
+        최고연령계급(MAX_AGE)은 MAX_AGE-1세 이상 정상인구 기준 생존률
+    """
+    life_expectancy = np.asarray(life_expectancy, dtype=float)
+    ages = np.arange(max_age + 1)
+    growth = np.exp(slope * ages) * np.expm1(slope) / slope
+
+    def survival(log_level):
+        return np.exp(-np.exp(log_level)[..., np.newaxis] * growth)
+
+    def expectancy(log_level):
+        survivors = np.cumprod(survival(log_level), axis=-1)
+        return 0.5 + survivors.sum(axis=-1)
+
+    low = np.full(life_expectancy.shape, -25.0)
+    high = np.full(life_expectancy.shape, 0.0)
+    for _ in range(60):
+        mid = (low + high) / 2
+        too_long = expectancy(mid) > life_expectancy
+        low = np.where(too_long, mid, low)
+        high = np.where(too_long, high, mid)
+
+    p = survival((low + high) / 2)
+    survivors = np.concatenate(
+        [np.ones(p.shape[:-1] + (1,)), np.cumprod(p, axis=-1)], axis=-1
+    )
+
+    table = np.ones(life_expectancy.shape + (N_AGES,))
+    table[..., 1:] = p[..., : N_AGES - 1]
+    table[..., MAX_AGE] = survivors[..., MAX_AGE:].sum(axis=-1) / survivors[
+        ..., MAX_AGE - 1 :
+    ].sum(axis=-1)
+    return table
 
-def create_initial_population_2023():
+
+def create_initial_population_2023(use_census=True):
     """2023년 초기 인구구조 생성
     국민연금 재정추계 자료 14페이지 참조
 
+    use_census: 통계청 총조사인구(docs/)가 있으면 그 1세별/성별 분포를
+        보고서 연령대별 인구에 맞춰 사용하고, 없으면 연령대별 가중치로 구성
     """
     # 연령대별 인구 (만명)
     age_groups = {"under_18": 705, "18_64": 3501, "65_plus": 950}
 
+    if use_census:
+        from data_loader import CENSUS_FILE, load_census_population
+
+        if CENSUS_FILE.exists():
+            counts = load_census_population().copy()
+            for (min_age, max_age), group in (
+                ((0, 17), "under_18"),
+                ((18, 64), "18_64"),
+                ((65, MAX_AGE), "65_plus"),
+            ):
+                band = counts[min_age : max_age + 1]
+                band *= age_groups[group] * 10000 / band.sum()
+            return PopulationState(counts).to_frame()
+
     # 연령별 인구 분포 (더 세분화된 데이터가 필요)
     population_structure = []
 
@@ -1,45 +1,58 @@
 import numpy as np
 import pandas as pd
 
+from nps_common import Schedule, get_schedule, params_version
+
+# 확률적 경제 시나리오의 변동요인 (scenario_params["correlation"]의 행/열 순서)
+SCENARIO_FACTORS = ("gdp_growth", "wage_growth", "inflation", "investment_return")
+
 
 class EconomicModule:
     def __init__(self):
         """경제모듈 초기화"""
         self.params = {
-            "gdp_growth_rate": {  # 실질 GDP 성장률
-                2023: 0.019,
-                2030: 0.019,
-                2040: 0.013,
-                2050: 0.007,
-                2060: 0.004,
-                2070: 0.002,
-            },
-            "wage_growth_rate": {  # 실질임금상승률
-                2023: 0.019,
-                2030: 0.019,
-                2040: 0.019,
-                2050: 0.018,
-                2060: 0.017,
-                2070: 0.016,
-            },
-            "inflation_rate": {  # 물가상승률 (보고서 p.12 참조)
-                2023: 0.022,
-                2024: 0.022,
-                2025: 0.022,
-                2026: 0.022,
-                2027: 0.022,
-                2030: 0.022,
-                2040: 0.020,
-                2050: 0.020,
-                2060: 0.020,
-            },
-            "nominal_wage_growth_rate": {  # 명목임금상승률
-                2023: 0.047,  # 4.7%
-                2030: 0.044,  # 4.4%
-                2040: 0.042,  # 4.2%
-                2050: 0.040,  # 4.0%
-                2060: 0.039,  # 3.9%
-            },
+            "gdp_growth_rate": Schedule(
+                {  # 실질 GDP 성장률
+                    2023: 0.019,
+                    2030: 0.019,
+                    2040: 0.013,
+                    2050: 0.007,
+                    2060: 0.004,
+                    2070: 0.002,
+                }
+            ),
+            "wage_growth_rate": Schedule(
+                {  # 실질임금상승률
+                    2023: 0.019,
+                    2030: 0.019,
+                    2040: 0.019,
+                    2050: 0.018,
+                    2060: 0.017,
+                    2070: 0.016,
+                }
+            ),
+            "inflation_rate": Schedule(
+                {  # 물가상승률 (보고서 p.12 참조)
+                    2023: 0.022,
+                    2024: 0.022,
+                    2025: 0.022,
+                    2026: 0.022,
+                    2027: 0.022,
+                    2030: 0.022,
+                    2040: 0.020,
+                    2050: 0.020,
+                    2060: 0.020,
+                }
+            ),
+            "nominal_wage_growth_rate": Schedule(
+                {  # 명목임금상승률
+                    2023: 0.047,  # 4.7%
+                    2030: 0.044,  # 4.4%
+                    2040: 0.042,  # 4.2%
+                    2050: 0.040,  # 4.0%
+                    2060: 0.039,  # 3.9%
+                }
+            ),
         }
 
         self.base_values = {
@@ -47,111 +60,255 @@ class EconomicModule:
             "nominal_wage": 3.85e2,  # 2023년 월평균 임금 (385만원),단위:만원
         }
 
-    def project_variables(self, year):
+        # 확률적 경제 시나리오의 충격 (연간 AR(1) 표준편차/지속성, 충격간 상관계수)
+        # 투자수익률 충격은 InvestmentModule.return_shocks(평균 0, 분산 1)이며
+        # 거시변수 충격을 그에 조건부로 뽑아 상관계수대로 연결한다
+        self.scenario_params = {
+            "gdp_growth_volatility": 0.01,  # 실질 GDP 성장률 충격
+            "gdp_growth_persistence": 0.5,
+            "wage_growth_volatility": 0.01,  # 실질임금상승률 충격
+            "wage_growth_persistence": 0.6,
+            "inflation_volatility": 0.01,  # 물가상승률 충격
+            "inflation_persistence": 0.7,
+            "correlation": np.array(  # SCENARIO_FACTORS 순서 (예시 값)
+                [
+                    [1.0, 0.6, 0.2, 0.3],
+                    [0.6, 1.0, 0.3, 0.1],
+                    [0.2, 0.3, 1.0, -0.2],
+                    [0.3, 0.1, -0.2, 1.0],
+                ]
+            ),
+        }
 
-        # 성장률 추계
-        gdp_growth = self._get_gdp_growth_rate(year)
-        real_wage_growth = self._get_wage_growth_rate(year)
-        inflation = self._get_inflation_rate(year)
-        nominal_wage_growth = self._get_nominal_wage_growth_rate(year)
+        self.base_year = 2023
+        self.horizon_end = 2093  # 기본 추계기간 (더 먼 연도를 요청하면 확장)
 
-        # GDP 추계 (실질, 명목)
-        real_gdp = self._calculate_real_gdp(year)
-        nominal_gdp = self._calculate_nominal_gdp(year)
+        # 전체 추계기간의 연도별 배열 캐시 (params/base_values 변경시 재계산)
+        self._horizon = None
+        self._horizon_key = None
 
-        # 임금 추계 (실질, 명목)
-        real_wage = self._calculate_real_wage(year)
-        nominal_wage = self._calculate_nominal_wage(year)
+    def project_variables(self, year):
+        """특정 연도의 거시경제변수 (전체 추계기간 배열에서 조회)"""
+        horizon = self._get_horizon(year)
+        idx = year - self.base_year
 
         return {
             "year": year,
+            "gdp_growth_rate": horizon["gdp_growth_rate"][idx],
+            "real_wage_growth_rate": horizon["real_wage_growth_rate"][idx],
+            "inflation_rate": horizon["inflation_rate"][idx],
+            "nominal_wage_growth_rate": horizon["nominal_wage_growth_rate"][idx],
+            "real_gdp": horizon["real_gdp"][idx],
+            "nominal_gdp": horizon["nominal_gdp"][idx],
+            "real_wage": horizon["real_wage"][idx],
+            "nominal_wage": horizon["nominal_wage"][idx],
+        }
+
+    def project_horizon(self, end_year=None):
+        """기준연도 ~ end_year의 거시경제변수를 연도별 배열로 반환"""
+        end_year = self.horizon_end if end_year is None else end_year
+        horizon = self._get_horizon(end_year)
+        n_years = end_year - self.base_year + 1
+
+        return {name: values[:n_years] for name, values in horizon.items()}
+
+    def _get_horizon(self, end_year):
+        """전체 추계기간 배열을 (필요하면 다시) 계산해 반환"""
+        if end_year < self.base_year:
+            raise ValueError(
+                f"{self.base_year}년 이전 경제변수는 계산할 수 없습니다: {end_year}"
+            )
+
+        horizon_key = (
+            params_version(self.params),
+            tuple(sorted(self.base_values.items())),
+        )
+        if (
+            self._horizon is None
+            or horizon_key != self._horizon_key
+            or end_year > self._horizon["year"][-1]
+        ):
+            last_year = max(end_year, self.horizon_end)
+            if self._horizon is not None and horizon_key == self._horizon_key:
+                last_year = max(last_year, 2 * end_year - self.base_year)
+            self._horizon = self._build_horizon(last_year)
+            self._horizon_key = horizon_key
+
+        return self._horizon
+
+    def _build_horizon(self, end_year):
+        """성장률 경로의 누적곱으로 GDP/임금 수준을 한 번에 계산
+
+        기준연도 값은 base_values이며, 다음 연도부터 해당 연도 성장률을 누적한다.
+        """
+        years = np.arange(self.base_year, end_year + 1)
+
+        def schedule(name):
+            return get_schedule(self.params, name).horizon(self.base_year, end_year)
+
+        gdp_growth = schedule("gdp_growth_rate")
+        real_wage_growth = schedule("wage_growth_rate")
+        inflation = schedule("inflation_rate")
+        nominal_wage_growth = schedule("nominal_wage_growth_rate")
+
+        real_gdp = self.base_values["nominal_gdp"] * cumulative_growth(gdp_growth)
+
+        return {
+            "year": years,
             "gdp_growth_rate": gdp_growth,
             "real_wage_growth_rate": real_wage_growth,
             "inflation_rate": inflation,
             "nominal_wage_growth_rate": nominal_wage_growth,
             "real_gdp": real_gdp,
-            "nominal_gdp": nominal_gdp,
-            "real_wage": real_wage,
-            "nominal_wage": nominal_wage,
+            "nominal_gdp": real_gdp * cumulative_growth(inflation),
+            "real_wage": self.base_values["nominal_wage"]
+            * cumulative_growth(real_wage_growth),
+            "nominal_wage": self.base_values["nominal_wage"]
+            * cumulative_growth(nominal_wage_growth),
         }
 
-    def _get_gdp_growth_rate(self, year):
+    def sample_scenarios(
+        self, n_sims, end_year=None, seed=None, return_shocks=None, inflation_rate=None
+    ):
+        """상관된 AR(1) 충격으로 거시경제변수의 (시뮬레이션, 연도) 경로를 추출
+
+        결정론적 가정(project_horizon) 주변에서 실질 GDP 성장률, 실질임금상승률,
+        물가상승률에 AR(1) 충격을 더한다. inflation_rate(기준연도부터의 연도별
+        물가상승률)가 주어지면 params["inflation_rate"] 대신 그 경로를 물가의
+        중심으로 쓴다(재정추계의 NPSCommon 가정값과 맞출 때). 충격의 혁신항은 scenario_params의
+        상관계수로 연결된 VAR(1)(대각 지속성)이며 기준연도 충격은 0이다.
+        return_shocks(기준연도부터의 (n_sims, 연도) 포트폴리오 수익률 충격,
+        InvestmentModule.return_shocks)가 주어지면 혁신항을 그 충격에 조건부로
+        뽑아 투자수익률과의 상관계수도 맞춘다. 수익률 자체는 InvestmentModule이
+        같은 충격과 이 물가상승률로 계산한다.
+
+        반환값의 각 배열은 (n_sims, 연도) 모양이며 price_index는 기준연도 = 1인
+        경로별 누적물가지수, real_wage_index는 가정값 대비 경로별 실질임금
+        수준(기준연도 = 1, 가입자 소득총액과 급여지출에 곱함)이다. 연도별 값은
+        scenario_variables로 조회한다.
+        """
+        end_year = self.horizon_end if end_year is None else end_year
+        horizon = self.project_horizon(end_year)
+        n_years = len(horizon["year"])
+
+        rng = np.random.default_rng(seed)
+        shocks = self._sample_var1(rng, n_sims, n_years, return_shocks)
+
+        # 충격 배열을 제자리에서 경로로 바꿔 (시뮬레이션, 연도) 배열 할당을 줄인다
+        # 명목임금상승률 = 가정값 + 실질임금 충격 + 물가 충격
+        nominal_wage_growth = shocks[1] + shocks[2]
+        nominal_wage_growth += horizon["nominal_wage_growth_rate"]
+        gdp_growth = shocks[0]
+        gdp_growth += horizon["gdp_growth_rate"]
+        real_wage_growth = shocks[1]
+        real_wage_growth += horizon["real_wage_growth_rate"]
+        inflation = shocks[2]
+        inflation += (
+            horizon["inflation_rate"] if inflation_rate is None else inflation_rate
+        )
+
+        real_gdp = cumulative_growth(gdp_growth)
+        real_gdp *= self.base_values["nominal_gdp"]
+        real_wage_index = cumulative_growth(real_wage_growth)
+        real_wage_index /= cumulative_growth(horizon["real_wage_growth_rate"])
 
-        years = sorted(self.params["gdp_growth_rate"].keys())
-        rates = [self.params["gdp_growth_rate"][y] for y in years]
+        return {
+            "year": horizon["year"],
+            "gdp_growth_rate": gdp_growth,
+            "real_wage_growth_rate": real_wage_growth,
+            "inflation_rate": inflation,
+            "nominal_wage_growth_rate": nominal_wage_growth,
+            "real_gdp": real_gdp,
+            "price_index": cumulative_growth(inflation),
+            "real_wage_index": real_wage_index,
+        }
 
-        if year >= years[-1]:
-            return rates[-1]
-        return np.interp(year, years, rates)
+    def scenario_variables(self, scenarios, year):
+        """sample_scenarios 결과에서 특정 연도의 거시경제변수 (시뮬레이션별 배열)
+
+        project_variables와 같은 항목에 price_index/real_wage_index를 더해
+        반환하므로 FinanceModule.project_balance에 그대로 넘길 수 있다.
+        """
+        idx = year - self.base_year
+        variables = {
+            name: values[..., idx]
+            for name, values in scenarios.items()
+            if name != "year"
+        }
+        variables["year"] = year
+        variables["nominal_gdp"] = variables["real_gdp"] * variables["price_index"]
+        return variables
+
+    def _sample_var1(self, rng, n_sims, n_years, return_shocks=None):
+        """(거시변수, 시뮬레이션, 연도) 모양의 상관된 AR(1) 충격 경로
+
+        거시변수(SCENARIO_FACTORS의 앞 3개) 충격은 기준연도 0에서 출발한다.
+        return_shocks(평균 0, 분산 1)가 주어지면 혁신항 e = L u + c z로
+        뽑는다(z: 수익률 충격, c: 수익률과의 상관계수, L: 잔여 상관행렬
+        R - c c'의 촐레스키 인자). z가 정규가 아니거나(수익률 모형) 평균이
+        옮겨져도(중요도 표본추출) 거시변수의 조건부 분포는 그대로이다.
+        """
+        macro_factors = SCENARIO_FACTORS[:3]
+        volatility = np.array(
+            [self.scenario_params[f"{factor}_volatility"] for factor in macro_factors]
+        )
+        persistence = np.array(
+            [self.scenario_params[f"{factor}_persistence"] for factor in macro_factors]
+        )
+        correlation = np.asarray(self.scenario_params["correlation"])
+        macro_correlation = correlation[:3, :3]
+        if return_shocks is not None:
+            return_correlation = correlation[:3, 3]
+            macro_correlation = macro_correlation - np.outer(
+                return_correlation, return_correlation
+            )
+        chol = np.linalg.cholesky(macro_correlation)
+        scale = chol * volatility[:, np.newaxis]
+
+        # 혁신항: 독립 표준정규 -> 상관계수의 촐레스키 인자와 표준편차로 변환
+        # (하삼각 인자이므로 뒤 요인부터 제자리에서 변환 가능)
+        innovations = rng.standard_normal((len(macro_factors), n_sims, n_years))
+        for i in reversed(range(len(macro_factors))):
+            innovations[i] *= scale[i, i]
+            for j in range(i):
+                innovations[i] += scale[i, j] * innovations[j]
+            if return_shocks is not None:
+                innovations[i] += (
+                    volatility[i] * return_correlation[i] * return_shocks[:, :n_years]
+                )
+        innovations[:, :, 0] = 0
+
+        # AR(1) 재귀 x[t] = persistence * x[t-1] + e[t]의 해 x[t] = sum persistence^(t-s) e[s]를
+        # (연도 x 연도) 하삼각 행렬 곱 한 번으로 계산
+        lag = np.subtract.outer(np.arange(n_years), np.arange(n_years))
+        shocks = np.empty_like(innovations)
+        for i, rho in enumerate(persistence):
+            if rho:
+                weights = np.where(lag >= 0, rho ** np.maximum(lag, 0), 0.0)
+                np.matmul(innovations[i], weights.T, out=shocks[i])
+            else:
+                shocks[i] = innovations[i]
+        return shocks
 
-    def _get_wage_growth_rate(self, year):
+    def _get_gdp_growth_rate(self, year):
 
-        years = sorted(self.params["wage_growth_rate"].keys())
-        rates = [self.params["wage_growth_rate"][y] for y in years]
+        return get_schedule(self.params, "gdp_growth_rate")(year)
 
-        if year >= years[-1]:
-            return rates[-1]
-        return np.interp(year, years, rates)
+    def _get_wage_growth_rate(self, year):
 
-    def _get_inflation_rate(self, year):
+        return get_schedule(self.params, "wage_growth_rate")(year)
 
-        years = sorted(self.params["inflation_rate"].keys())
-        rates = [self.params["inflation_rate"][y] for y in years]
+    def _get_inflation_rate(self, year):
 
-        if year >= years[-1]:
-            return rates[-1]
-        return np.interp(year, years, rates)
+        return get_schedule(self.params, "inflation_rate")(year)
 
     def _get_nominal_wage_growth_rate(self, year):
 
-        years = sorted(self.params["nominal_wage_growth_rate"].keys())
-        rates = [self.params["nominal_wage_growth_rate"][y] for y in years]
-
-        if year >= years[-1]:
-            return rates[-1]
-        return np.interp(year, years, rates)
-
-    def _calculate_real_gdp(self, year):
-
-        base_year = 2023
-        real_gdp = self.base_values["nominal_gdp"]
-
-        for y in range(base_year + 1, year + 1):
-            growth_rate = self._get_gdp_growth_rate(y)
-            real_gdp *= 1 + growth_rate
-
-        return real_gdp
-
-    def _calculate_nominal_gdp(self, year):
-
-        real_gdp = self._calculate_real_gdp(year)
-        base_year = 2023
-        inflation_factor = 1.0
-
-        for y in range(base_year + 1, year + 1):
-            inflation_rate = self._get_inflation_rate(y)
-            inflation_factor *= 1 + inflation_rate
-
-        return real_gdp * inflation_factor
-
-    def _calculate_real_wage(self, year):
-
-        base_year = 2023
-        real_wage = self.base_values["nominal_wage"]
-
-        for y in range(base_year + 1, year + 1):
-            growth_rate = self._get_wage_growth_rate(y)
-            real_wage *= 1 + growth_rate
-
-        return real_wage
-
-    def _calculate_nominal_wage(self, year):
-
-        base_year = 2023
-        nominal_wage = self.base_values["nominal_wage"]
+        return get_schedule(self.params, "nominal_wage_growth_rate")(year)
 
-        for y in range(base_year + 1, year + 1):
-            growth_rate = self._get_nominal_wage_growth_rate(y)
-            nominal_wage *= 1 + growth_rate
 
-        return nominal_wage
+def cumulative_growth(rates):
+    """(..., 연도) 성장률 경로의 누적 배수 (첫 해 = 1, 다음 연도부터 누적)"""
+    factors = np.asarray(rates) + 1.0
+    factors[..., 0] = 1
+    return np.cumprod(factors, axis=-1, out=factors)
@@ -1,7 +1,7 @@
 # 재정모듈
 import pandas as pd
 import numpy as np
-from nps_common import NPSCommon
+from nps_common import NPSCommon, Schedule, get_schedule
 from investment_module import InvestmentModule
 
 
@@ -32,10 +32,18 @@ class FinanceModule:
         # 실질 수입/지출/수지차 추계
         real_revenue = self._calculate_total_revenue(year, subscribers, economic_vars)
         real_expenditure = self._calculate_total_expenditure(year, benefits)
+        # 급여는 가입자 평균소득(A값)에 비례하므로 실질임금 충격도 함께 받는다
+        if "real_wage_index" in economic_vars:
+            real_expenditure = real_expenditure * economic_vars["real_wage_index"]
         real_balance = real_revenue - real_expenditure
 
-        # 명목가치 변환
-        cumulative_inflation = self._get_cumulative_inflation(2023, year)
+        # 명목가치 변환 (경제 시나리오가 주어지면 경로별 누적물가지수 사용)
+        if "price_index" in economic_vars:
+            cumulative_inflation = economic_vars["price_index"]
+        else:
+            cumulative_inflation = self._get_cumulative_inflation(
+                self.common.base_year, year
+            )
         nominal_revenue = real_revenue * cumulative_inflation
         nominal_expenditure = real_expenditure * cumulative_inflation
         nominal_balance = real_balance * cumulative_inflation
@@ -60,15 +68,148 @@ class FinanceModule:
             "real_gdp": economic_vars["real_gdp"],
         }
 
+    def project_horizon(
+        self,
+        years,
+        total_income_real,
+        total_benefits_real,
+        price_index=None,
+        real_investment_return=None,
+        real_gdp=None,
+        nominal_gdp=None,
+        dynamic_returns=None,
+        real_wage_index=None,
+    ):
+        """전체 추계기간 재정수지 추계 (연도별 배열 -> 항목별 배열)
+
+        project_balance를 매년 호출하는 것과 같은 계산을 배열로 수행한다.
+        입력은 (..., 연도) 모양이며 앞쪽 축(시뮬레이션 등)은 브로드캐스팅된다.
+            total_income_real: 실질 가입자 소득총액
+            total_benefits_real: 실질 급여지출
+            price_index: 기준연도 대비 누적물가지수 (없으면 NPSCommon 가정값)
+            real_investment_return: 실질투자수익률 (없으면 투자모듈 가정값)
+            dynamic_returns: 전년도 재정상태로 매년 수익률을 정하는 객체
+                (InvestmentModule.dynamic_returns, real_investment_return 대신 사용)
+            real_wage_index: 가정값 대비 실질임금 수준 (경제 시나리오, 소득총액과
+                급여지출에 곱함, BenefitModule의 급여는 가입자 평균소득에 비례)
+        적립금은 현재 reserve_fund/real_reserve_fund에서 출발하며 객체 상태는
+        바꾸지 않는다. 반환값은 project_balance와 같은 항목의 배열이다.
+        """
+        years = np.asarray(years)
+        if price_index is None:
+            price_index = self._get_cumulative_inflation(self.common.base_year, years)
+        if dynamic_returns is not None:
+            real_investment_return = np.zeros(dynamic_returns.shape)
+        elif real_investment_return is None:
+            real_investment_return = self._get_real_investment_returns(years)
+
+        # 적립금 재귀와 무관한 항목은 한 번에 계산
+        contribution_revenue = (
+            np.asarray(total_income_real) * self.params["contribution_rate"]
+        )
+        total_benefits_real = np.asarray(total_benefits_real)
+        if real_wage_index is not None:
+            contribution_revenue = contribution_revenue * real_wage_index
+            total_benefits_real = total_benefits_real * real_wage_index
+        real_expenditure = self._calculate_total_expenditure(
+            years, {"total_benefits_real": total_benefits_real}
+        )
+        shape = np.broadcast_shapes(
+            contribution_revenue.shape,
+            real_expenditure.shape,
+            np.shape(price_index),
+            np.shape(real_investment_return),
+        )
+        inputs = [
+            np.broadcast_to(values, shape)
+            for values in (
+                contribution_revenue,
+                real_expenditure,
+                price_index,
+                real_investment_return,
+            )
+        ]
+        real_expenditure, price_index = inputs[1], inputs[2]
+
+        # 적립금 재귀 (0 하한): 전년도 실질 적립금 x 실질수익률이 투자수입
+        # 경로가 하나면 파이썬 실수로, 여러 개면 앞쪽 축 배열로 연도별 반복
+        if len(shape) == 1 and np.ndim(self.reserve_fund) == 0:
+            columns = [values.tolist() for values in inputs]
+            floor = max
+        else:
+            columns = [np.moveaxis(values, -1, 0) for values in inputs]
+            floor = np.maximum
+
+        reserve = self.reserve_fund
+        real_reserve = self.real_reserve_fund
+        if dynamic_returns is not None:
+            # 첫 해의 '전년도' 상태: 현재 적립금, 투자수입을 뺀 당해 수지
+            contribution, expenditure, index = (values[0] for values in columns[:3])
+            state = {
+                "nominal_reserve_fund": np.broadcast_to(reserve, shape[:-1]),
+                "real_reserve_fund": np.broadcast_to(real_reserve, shape[:-1]),
+                "real_balance": contribution - expenditure,
+                "fund_ratio": reserve / (expenditure * index),
+            }
+
+        revenues, reserves, real_reserves = [], [], []
+        for t, (contribution, expenditure, index, real_return) in enumerate(
+            zip(*columns)
+        ):
+            if dynamic_returns is not None:
+                real_return = dynamic_returns.step(t, state)
+            revenue = contribution + real_reserve * real_return
+            reserve = floor(0, reserve + (revenue - expenditure) * index)
+            real_reserve = reserve / index
+            revenues.append(revenue)
+            reserves.append(reserve)
+            real_reserves.append(real_reserve)
+            if dynamic_returns is not None:
+                state = {
+                    "nominal_reserve_fund": reserve,
+                    "real_reserve_fund": real_reserve,
+                    "real_balance": revenue - expenditure,
+                    "fund_ratio": reserve / (expenditure * index),
+                }
+
+        real_revenue = np.moveaxis(np.array(revenues), 0, -1)
+        reserve_fund = np.moveaxis(np.array(reserves), 0, -1)
+        real_reserve_fund = np.moveaxis(np.array(real_reserves), 0, -1)
+
+        real_balance = real_revenue - real_expenditure
+        nominal_expenditure = real_expenditure * price_index
+
+        return {
+            "year": years,
+            "nominal_revenue": real_revenue * price_index,
+            "real_revenue": real_revenue,
+            "nominal_expenditure": nominal_expenditure,
+            "real_expenditure": real_expenditure,
+            "nominal_balance": real_balance * price_index,
+            "real_balance": real_balance,
+            "nominal_reserve_fund": reserve_fund,
+            "real_reserve_fund": real_reserve_fund,
+            "fund_ratio": reserve_fund / nominal_expenditure,
+            "nominal_gdp": nominal_gdp,
+            "real_gdp": real_gdp,
+        }
+
     def _calculate_total_revenue(self, year, subscribers, economic_vars):
         # 보험료 수입 (실질가치)
         contribution_revenue = (
             subscribers["total_income_real"] * self.params["contribution_rate"]
         )
+        # 경제 시나리오의 실질임금 충격은 가입자 소득에 비례해 보험료를 바꾼다
+        if "real_wage_index" in economic_vars:
+            contribution_revenue = (
+                contribution_revenue * economic_vars["real_wage_index"]
+            )
         # 투자 수익 (실질수익률 적용)
         # real_return = self._get_real_investment_return(year)
         # real_return = self.params["real_investment_return_fixed"]
-        if self.investment_module:
+        if "real_investment_return" in economic_vars:
+            real_return = economic_vars["real_investment_return"]
+        elif self.investment_module:
             investment_returns = self.investment_module.get_investment_returns(year)
             real_return = investment_returns["real"]
         else:
@@ -94,28 +235,23 @@ class FinanceModule:
         # 전년도 적립금 + 당해연도 수지
         new_reserve_fund = self.reserve_fund + balance
 
-        # 적립금이 음수가 되는 경우 0으로 처리
-        return max(0, new_reserve_fund)
+        # 적립금이 음수가 되는 경우 0으로 처리 (시뮬레이션별 배열도 지원)
+        return np.maximum(0, new_reserve_fund)
+
+    def _get_real_investment_returns(self, years):
+        """연도별 실질투자수익률 (_calculate_total_revenue와 같은 가정)"""
+        if self.investment_module:
+            return self.investment_module.get_investment_returns(years)["real"]
+        return np.full(np.shape(years), 0.025)  # 고정값 for test
 
     def _get_real_investment_return(self, year):
         """특정 연도의 실질투자수익률 반환"""
         # 실질투자수익률 직접 사용
-        years = sorted(self.params["real_investment_return"].keys())
-        rates = [self.params["real_investment_return"][y] for y in years]
-        if year >= years[-1]:
-            return rates[-1]
-        else:
-            return np.interp(year, years, rates)
+        return get_schedule(self.params, "real_investment_return")(year)
 
     def _get_nominal_investment_return(self, year):
         """특정 연도의 명목투자수익률 반환"""
-        years = sorted(self.params["nominal_investment_return"].keys())
-        rates = [self.params["nominal_investment_return"][y] for y in years]
-
-        if year >= years[-1]:
-            return rates[-1]
-        else:
-            return np.interp(year, years, rates)
+        return get_schedule(self.params, "nominal_investment_return")(year)
 
     def _get_inflation_rate(self, year):
         return self.common.get_inflation_rate(year)
@@ -125,7 +261,10 @@ class FinanceModule:
 
 
 class SubscriberModule:
-    def __init__(self, common: NPSCommon):
+    def __init__(self, common: NPSCommon, use_wage_data=True):
+        """use_wage_data: 고용노동부 평균임금(docs/)이 있으면 연령대 평균소득을
+        1세별/성별 임금 분포로 나눠 적용 (없으면 연령대 평균소득 그대로)
+        """
         self.common = common
         self.params = {
             "participation_rate": {  # 가입률 -> 여성정책연구원 성인지 통계자료
@@ -141,6 +280,10 @@ class SubscriberModule:
                 (60, 64): 300,
             },
         }
+        # 연령대 안의 1세별/성별 상대임금 (연령대 평균 1, None이면 균등)
+        self.income_profile = (
+            load_income_profile(self.params["avg_income"]) if use_wage_data else None
+        )
 
     def _get_inflation_rate(self, year):
         return self.common.get_inflation_rate(year)
@@ -150,25 +293,30 @@ class SubscriberModule:
         total_income_real = 0
 
         # 물가상승률은 한 번만 계산
-        cumulative_inflation = 1.0
-        base_year = 2023
-        for y in range(base_year + 1, year + 1):
-            inflation_rate = self._get_inflation_rate(y)
-            cumulative_inflation *= 1 + inflation_rate
+        cumulative_inflation = self.common.get_cumulative_inflation(
+            self.common.base_year, year
+        )
 
         for age_group, rate in self.params["participation_rate"].items():
             # 해당 연령대 인구
-            age_pop = population_structure[
-                (population_structure["age"] >= age_group[0])
-                & (population_structure["age"] <= age_group[1])
-            ]["total"].sum()
+            age_pop = population_structure.band_total(age_group[0], age_group[1])
 
             # 연령대 가입자 수
             subscribers[age_group] = age_pop * rate
 
             # 실질 소득 계산 (2023년 기준 실질가치)
             avg_income = self.params["avg_income"][age_group]
-            total_income_real += subscribers[age_group] * avg_income * 12
+            if self.income_profile is None:
+                total_income_real += subscribers[age_group] * avg_income * 12
+            else:
+                # 연령대 인구를 1세별/성별 상대임금으로 가중
+                min_age, max_age = age_group
+                weighted_pop = np.einsum(
+                    "...as,as->...",
+                    population_structure.counts[..., min_age : max_age + 1, :],
+                    self.income_profile[min_age : max_age + 1],
+                )
+                total_income_real += weighted_pop * rate * avg_income * 12
 
         # 명목가치로 변환
         total_income_nominal = total_income_real * cumulative_inflation
@@ -182,25 +330,49 @@ class SubscriberModule:
         }
 
 
+def load_income_profile(age_groups):
+    """고용노동부 평균임금(docs/)의 연령대별 상대임금 (연령, 성별) 배열
+
+    각 연령대 안의 1세별/성별 월임금을 그 연령대의 평균으로 나눈 값이며,
+    연령대 밖은 1이다. 임금 파일이 없으면 None을 반환한다.
+    """
+    from data_loader import WAGE_FILE, load_average_wages
+
+    if not WAGE_FILE.exists():
+        return None
+
+    wages = load_average_wages()
+    profile = np.ones_like(wages)
+    for min_age, max_age in age_groups:
+        band = wages[min_age : max_age + 1]
+        profile[min_age : max_age + 1] = band / band.mean()
+    return profile
+
+
 class BenefitModule:
     def __init__(self, common: NPSCommon):
         self.common = common
         self.params = {
             "income_replacement": 0.40,  # 소득대체율 40%
-            "avg_insured_period": {  # 평균가입기간
-                2023: 15,
-                2030: 18,
-                2040: 22,
-                2050: 25,
-                2060: 28,
-            },
-            "benefit_rate": {  # 수급률 (65세 이상 인구 대비)
-                2023: 0.440,  # 44.0%
-                2030: 0.550,
-                2040: 0.650,
-                2050: 0.750,
-                2060: 0.800,
-            },
+            "avg_insured_period": Schedule(
+                {  # 평균가입기간
+                    2023: 15,
+                    2030: 18,
+                    2040: 22,
+                    2050: 25,
+                    2060: 28,
+                }
+            ),
+            "pension_start_age": 65,  # 수급개시연령
+            "benefit_rate": Schedule(
+                {  # 수급률 (수급개시연령 이상 인구 대비)
+                    2023: 0.440,  # 44.0%
+                    2030: 0.550,
+                    2040: 0.650,
+                    2050: 0.750,
+                    2060: 0.800,
+                }
+            ),
         }
 
     def _get_inflation_rate(self, year):  # subscriber와 중복됨 개선필요
@@ -210,29 +382,15 @@ class BenefitModule:
         return self.common.get_cumulative_inflation(base_year, target_year)
 
     def _get_benefit_rate(self, year):
-
-        years = sorted(self.params["benefit_rate"].keys())
-        rates = [self.params["benefit_rate"][y] for y in years]
-
-        if year >= years[-1]:
-            return rates[-1]
-        return np.interp(year, years, rates)
+        return get_schedule(self.params, "benefit_rate")(year)
 
     def _get_avg_insured_period(self, year):
-
-        years = sorted(self.params["avg_insured_period"].keys())
-        periods = [self.params["avg_insured_period"][y] for y in years]
-
-        if year >= years[-1]:
-            return periods[-1]
-        return np.interp(year, years, periods)
+        return get_schedule(self.params, "avg_insured_period")(year)
 
     def project_benefits(self, year, population_structure, subscribers_data):
 
         # 수급자 수 추계
-        elderly_pop = population_structure[population_structure["age"] >= 65][
-            "total"
-        ].sum()
+        elderly_pop = population_structure.band_total(self.params["pension_start_age"])
         benefit_rate = self._get_benefit_rate(year)
         beneficiaries = elderly_pop * benefit_rate
 
@@ -251,7 +409,9 @@ class BenefitModule:
         total_benefits_real = beneficiaries * avg_benefit_real
 
         # 명목가치 변환
-        cumulative_inflation = self._get_cumulative_inflation(2023, year)
+        cumulative_inflation = self._get_cumulative_inflation(
+            self.common.base_year, year
+        )
         total_benefits_nominal = total_benefits_real * cumulative_inflation
         avg_benefit_nominal = avg_benefit_real * cumulative_inflation
 
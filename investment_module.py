@@ -1,5 +1,24 @@
 import numpy as np
-from nps_common import NPSCommon
+from nps_common import NPSCommon, child_seed
+
+# 수익률 충격 모형별 기본 모수 (return_model_params로 덮어씀)
+#   normal: 정규분포
+#   student_t: 경로/연도마다 공통 카이제곱 혼합(다변량 t, 분산 1로 표준화)
+#   regime_switching: 2상태 마르코프 국면(평상/위기)별 변동성 배율과 평균 이동
+#       (표준편차 단위, 정상분포 기준 평균 0/분산 1이 되도록 조정)
+#   garch: 포트폴리오 충격의 GARCH(1,1) 조건부 분산 (무조건부 분산 1)
+#   bootstrap: historical_returns 표의 정상 블록 부트스트랩 (평균 블록 길이, 년)
+RETURN_MODELS = {
+    "normal": {},
+    "student_t": {"degrees_of_freedom": 5},
+    "regime_switching": {
+        "transition": [[0.9, 0.1], [0.3, 0.7]],  # [현재 국면][다음 국면] 확률
+        "volatility_scale": [0.8, 1.8],
+        "mean_shift": [0.3, -1.0],
+    },
+    "garch": {"alpha": 0.1, "beta": 0.85},
+    "bootstrap": {"mean_block_length": 5},
+}
 
 
 class InvestmentModule:
@@ -12,10 +31,101 @@ class InvestmentModule:
         correlations_scenario=None,
         stochastic=False,
         simulation_number=0,
+        seed=None,
+        block_size=None,
+        rebalancing="annual",
+        allocation_schedule=None,
+        allocation_rules=None,
+        variance_reduction=None,
+        control_variate=False,
+        importance_tilt=0.0,
+        importance_end_year=None,
+        return_model="normal",
+        return_model_params=None,
+        historical_returns=None,
     ):
         self.stochastic = stochastic
         self.simulation_number = simulation_number
 
+        # 수익률 난수: 경로 block_size개마다 독립 하위 난수열 (seed: 정수/SeedSequence)
+        self.seed_sequence = (
+            seed
+            if isinstance(seed, np.random.SeedSequence)
+            else np.random.SeedSequence(seed)
+        )
+        # 분산감소: None(의사난수), "antithetic"(경로 2개씩 부호 반대 충격),
+        # "sobol"(블록마다 스크램블 소볼 수열 -> 역정규분포, 블록 크기는 기본으로
+        # 경로 수에서 정함)
+        if variance_reduction not in (None, "antithetic", "sobol"):
+            raise ValueError(f"지원하지 않는 분산감소 방식입니다: {variance_reduction}")
+        self.variance_reduction = variance_reduction
+        if block_size is None:
+            block_size = (
+                _sobol_block_size(simulation_number)
+                if variance_reduction == "sobol"
+                else 1000
+            )
+        if variance_reduction == "sobol" and block_size & (block_size - 1):
+            raise ValueError(
+                f"소볼 수열의 block_size는 2의 거듭제곱이어야 합니다: {block_size}"
+            )
+        if variance_reduction == "antithetic" and block_size % 2:
+            raise ValueError(f"대조변량의 block_size는 짝수여야 합니다: {block_size}")
+        self.block_size = block_size
+        # 분산감소를 쓰면 표준오차(estimate_mean)에 독립 경로 묶음이 2개 이상 필요
+        if (
+            stochastic
+            and variance_reduction is not None
+            and simulation_number
+            and simulation_number < 2 * self.estimator_group_size()
+        ):
+            raise ValueError(
+                f"경로 {simulation_number}개로는 표준오차를 계산할 수 없습니다 "
+                f"(독립 묶음 {self.estimator_group_size()}개 경로 x 2 이상 필요)"
+            )
+        # 결정론적 경로의 누적수익률을 통제변량으로 평균 추정 (estimate_mean)
+        self.control_variate = control_variate
+        # 중요도 표본추출: 포트폴리오 충격의 평균을 연도마다 importance_tilt(표준편차
+        # 단위, 음수면 불리한 수익률 쪽)만큼 옮기고 경로별 우도비로 가중
+        # importance_end_year 이후 연도는 옮기지 않음 (관심 사건 이후의 우도비 분산 방지)
+        self.importance_tilt = importance_tilt
+        self.importance_end_year = importance_end_year
+        # 수익률 충격 모형 (RETURN_MODELS): 평균/분산은 정규 모형과 같고 꼬리/군집만 다름
+        if return_model not in RETURN_MODELS:
+            raise ValueError(f"지원하지 않는 수익률 모형입니다: {return_model}")
+        self.return_model = return_model
+        self.return_model_params = {
+            **RETURN_MODELS[return_model],
+            **(return_model_params or {}),
+        }
+        # 과거 연간 자산별 수익률 표 (bootstrap 모형, data_loader.load_historical_returns)
+        # {자산: 연도별 수익률} 또는 자산 이름 열의 DataFrame, 행은 연도 순서
+        self.historical_returns = historical_returns
+        self._historical_table = None  # (자산 순서, (연도, 자산) 배열) 캐시
+        if return_model == "bootstrap":
+            if historical_returns is None:
+                raise ValueError("bootstrap 모형에는 historical_returns가 필요합니다")
+            if importance_tilt:
+                raise ValueError("bootstrap 모형에는 중요도 표본추출을 쓸 수 없습니다")
+            # 통제변량의 기댓값은 모수적 기대수익률 기준이고, 블록 안의 연도 간
+            # 상관 때문에 과거 표 평균으로도 누적 배수의 기댓값이 정확하지 않다
+            if control_variate:
+                raise ValueError("bootstrap 모형에는 통제변량을 쓸 수 없습니다")
+        # 포트폴리오 수익률: "annual"(매년 asset_allocation으로 재조정), "drift"(비중 표류)
+        if rebalancing not in ("annual", "drift"):
+            raise ValueError(f"지원하지 않는 리밸런싱 방식입니다: {rebalancing}")
+        self.rebalancing = rebalancing
+        # 통제변량의 기댓값(결정론적 누적수익률)은 연도별 수익률의 평균이
+        # 비중 x 기대수익률이고 연도 간 상관이 없을 때만 정확하다
+        if control_variate and rebalancing == "drift":
+            raise ValueError("drift 리밸런싱에는 통제변량을 쓸 수 없습니다")
+        if control_variate and return_model == "regime_switching":
+            raise ValueError("국면전환 모형에는 통제변량을 쓸 수 없습니다")
+        self._asset_params = None  # (키, 자산별 배열) 캐시
+        self._path_block = None  # get_investment_returns의 경로 블록 수익률 캐시
+        # 경로 번호 없이 호출된 get_investment_returns용 난수열
+        self._rng = np.random.default_rng(child_seed(self.seed_sequence, 1))
+
         self.common = common
         self.asset_allocation = (
             asset_allocation_scenario
@@ -40,6 +150,12 @@ class InvestmentModule:
             else self._get_default_correlations()
         )
 
+        # 연도별 자산배분 {기준연도: {자산: 비중}} (없으면 asset_allocation 고정)
+        # 기준연도 사이는 선형보간, 처음/마지막 기준연도 밖은 양끝 비중 유지
+        self.allocation_schedule = allocation_schedule
+        # 재정상태에 따른 동적 자산배분 규칙 (순서대로 적용, threshold_rule 참고)
+        self.allocation_rules = list(allocation_rules or [])
+
         self.portfolio_volatility = self.calculate_portfolio_volatility()
 
     def _get_default_asset_allocation(self):
@@ -137,8 +253,6 @@ class InvestmentModule:
     #     self.expected_returns = new_returns
 
     # def calculate_nominal_portfolio_return(self, year=None):
-
-    #     # TODO: 연도(year)별 자산배분
     #     total_return = 0
     #     total_weight = 0
 
@@ -159,31 +273,121 @@ class InvestmentModule:
     #     real_return = (1 + nominal_return) / (1 + inflation_rate) - 1
     #     return real_return
 
-    def get_investment_returns(self, year=None, simulation_index=None):
-        """
-        deterministic assumption
-        no vol and corr
-        see simulation_return() for stochastic version.
-        """
-        # TODO: 연도(year)별 자산배분
+    def calculate_nominal_portfolio_return(self, year=None):
+        """자산배분 가중 명목 기대수익률 (year: 연도별 자산배분 적용, 배열 가능)"""
+        if year is not None and self.allocation_schedule is not None:
+            expected_returns = self._get_asset_params(year)["expected_returns"]
+            return self.allocation_matrix(year) @ expected_returns
+
         nominal_return = 0
-        real_return = 0
-        total_weight = 0
 
-        # calculate nominl return
         for asset, weight in self.asset_allocation.items():
             if asset in self.expected_returns:
-
                 nominal_return += weight * self.expected_returns[asset]
-
-                total_weight += weight
-
             else:
                 print(f"Warning: Expected return for '{asset}' not found. Skipping.")
 
+        return nominal_return
+
+    def allocation_matrix(self, years, allocation=None):
+        """연도별 자산배분 비중 (..., 자산) 배열 (자산 순서는 correlations["assets"])
+
+        allocation: {자산: 비중}(고정) 또는 {기준연도: {자산: 비중}}(연도별),
+        없으면 allocation_schedule 또는 asset_allocation을 쓴다.
+        연도별 비중은 기준연도 사이는 선형보간하고 밖은 양끝 값을 쓴다.
+        """
+        if allocation is None:
+            allocation = (
+                self.allocation_schedule
+                if self.allocation_schedule is not None
+                else self.asset_allocation
+            )
+        assets = self.correlations["assets"]
+        years = np.asarray(years)
+        if not any(isinstance(weights, dict) for weights in allocation.values()):
+            weights = self.allocation_vector(allocation)
+            return np.broadcast_to(weights, years.shape + (len(assets),))
+
+        anchors = sorted(allocation)
+        table = np.array([self.allocation_vector(allocation[year]) for year in anchors])
+        return np.stack(
+            [np.interp(years, anchors, table[:, i]) for i in range(len(assets))],
+            axis=-1,
+        )
+
+    def allocation_vector(self, allocation):
+        """{자산: 비중} -> 자산 순서(correlations["assets"])의 비중 배열"""
+        return np.array(
+            [allocation.get(asset, 0.0) for asset in self.correlations["assets"]]
+        )
+
+    def threshold_rule(self, variable, threshold, allocation, below=True):
+        """재정상태 variable이 threshold 미만(below=False면 초과)인 경로를
+        allocation({자산: 비중})으로 바꾸는 자산배분 규칙
+
+        규칙은 rule(year, state, weights) -> weights 모양의 함수다. state는
+        전년도 말 재정상태(nominal_reserve_fund, real_reserve_fund,
+        real_balance, fund_ratio의 경로별 배열)이고 weights는 (시뮬레이션, 자산)
+        비중이며, 조건에 맞는 경로만 np.where로 한 번에 바꾼다.
+            예) 적립배율 5배 미만이면 채권 위주로:
+                investment.threshold_rule("fund_ratio", 5, {"domestic_bond": 1.0})
+            예) 수지 적자로 돌아서면: threshold_rule("real_balance", 0, ...)
+        """
+        target = self.allocation_vector(allocation)
+
+        def rule(year, state, weights):
+            values = state[variable]
+            mask = values < threshold if below else values > threshold
+            return np.where(mask[..., np.newaxis], target, weights)
+
+        return rule
+
+    def dynamic_returns(self, years, n_sims, start=0, inflation_rate=None):
+        """allocation_rules를 적용하는 경로별 수익률 (FinanceModule.project_horizon용)
+
+        자산별 수익률은 sample_asset_returns와 같은 난수로 한 번에 뽑아 두고,
+        연도별 비중은 적립금 재귀와 함께 매년 전년도 재정상태로 정한다.
+        inflation_rate: (..., 연도) 실질수익률 환산용 물가상승률 (없으면 가정값)
+        """
+        years = np.asarray(years)
+        offsets = years - self.common.base_year
+        asset_returns, normals = self._asset_returns(offsets.max() + 1, n_sims, start)
+        if inflation_rate is None:
+            inflation_rate = self.common.get_inflation_rate(years)
+        return RuleBasedReturns(
+            years,
+            asset_returns[:, offsets],
+            self.allocation_matrix(years),
+            np.broadcast_to(inflation_rate, (n_sims, len(years))),
+            self.allocation_rules,
+            self.rebalancing,
+            self.likelihood_ratio(normals),
+        )
+
+    def get_investment_returns(self, year=None, simulation_index=None):
+        """
+        deterministic assumption
+        no vol and corr
+        see simulation_return() for stochastic version.
+        """
+        nominal_return = self.calculate_nominal_portfolio_return(year)
+        if np.ndim(year):
+            nominal_return = np.broadcast_to(nominal_return, np.shape(year)).copy()
+
         if self.stochastic:
-            np.random.seed(simulation_index if simulation_index is not None else None)
-            nominal_return = np.random.normal(nominal_return, self.portfolio_volatility)
+            # 경로 번호가 없으면 연도마다(year가 배열이면 원소별로) 독립 충격
+            size = np.shape(year) or None
+            if simulation_index is None and self.return_model == "bootstrap":
+                # 과거 임의 연도의 자산별 수익률을 그 해 비중으로 합산
+                table = self._get_historical_table()
+                rows = table[self._rng.integers(len(table), size=size)]
+                nominal_return = (self.allocation_matrix(year) * rows).sum(axis=-1)
+            elif simulation_index is None:
+                shock = self._single_shock(size)
+                volatility = self.calculate_portfolio_volatility(year)
+                nominal_return = nominal_return + volatility * shock
+            else:
+                nominal_return = self._path_returns(year, simulation_index)
 
         inflation_rate = self.common.get_inflation_rate(year)
 
@@ -192,32 +396,658 @@ class InvestmentModule:
 
         return {"nominal": nominal_return, "real": real_return}
 
-    def calculate_portfolio_volatility(self):
+    def _path_returns(self, year, simulation_index):
+        """simulation_index번 경로의 year(스칼라 또는 배열) 명목수익률
+
+        경로가 속한 블록(block_size개 경로)의 기준연도 ~ horizon_end 수익률을
+        sample_returns로 한 번 만들어 캐시하므로, 같은 블록의 경로/연도를
+        차례로 조회해도 블록은 한 번만 생성된다. 값은 같은 추계기간의
+        sample_returns 결과와 같다. 가정(자산별 배열, 과거 수익률 표)이나
+        수익률 모형 설정이 바뀌면 다시 만든다.
+        """
+        base_year = self.common.base_year
+        block, offset = divmod(simulation_index, self.block_size)
+        end_year = max(int(np.max(year)), self.common.horizon_end)
+        asset_params = self._get_asset_params(end_year)
+        history = (
+            self._get_historical_table() if self.return_model == "bootstrap" else None
+        )
+        key = (
+            block,
+            end_year,
+            self.block_size,
+            self.variance_reduction,
+            self.rebalancing,
+            self.return_model,
+            repr(sorted(self.return_model_params.items())),
+            self.importance_tilt,
+            self.importance_end_year,
+        )
+        cached = self._path_block
+        if (
+            cached is None
+            or cached[0] != key
+            or cached[1] is not asset_params
+            or cached[2] is not history
+        ):
+            returns = self.sample_returns(
+                np.arange(base_year, end_year + 1),
+                self.block_size,
+                start=block * self.block_size,
+            )["nominal"]
+            cached = self._path_block = (key, asset_params, history, returns)
+        return cached[3][offset, np.asarray(year) - base_year]
+
+    def sample_returns(self, years, n_sims, start=0, inflation_rate=None):
+        """경로 start ~ start + n_sims - 1의 (시뮬레이션, 연도) 포트폴리오 수익률
+
+        annual 리밸런싱이면 연도별 포트폴리오 수익률이 정규분포(w_t'μ, w_t'Σw_t)
+        이므로 경로/연도당 충격 하나로 뽑고, drift면 자산별 수익률에서 합산한다.
+        실질수익률은 연도별 물가상승률(inflation_rate: (..., 연도) 경제 시나리오,
+        없으면 가정값)로 환산한다. 충격은 경로/연도별로
+        고정되므로 경로를 나눠 뽑아도 결과가 같다. likelihood_ratio는 경로별
+        우도비(importance_tilt가 0이면 1)다.
+        """
+        years = np.asarray(years)
+        offsets = years - self.common.base_year
+        n_years = offsets.max() + 1
+
+        if self.rebalancing == "annual" and self.return_model != "bootstrap":
+            params = self._get_asset_params(self.common.base_year + n_years - 1)
+            normals, shocks, _ = self._shocks(n_years, n_sims, start)
+            nominal_return = params["portfolio_return"][offsets] + (
+                params["portfolio_volatility"][offsets] * shocks[:, offsets]
+            )
+        else:
+            asset_returns, normals = self._asset_returns(n_years, n_sims, start)
+            nominal_return = self.portfolio_returns(asset_returns)[0][:, offsets]
+
+        if inflation_rate is None:
+            inflation_rate = self.common.get_inflation_rate(years)
+        real_return = (1 + nominal_return) / (1 + inflation_rate) - 1
+
+        return {
+            "nominal": nominal_return,
+            "real": real_return,
+            "likelihood_ratio": self.likelihood_ratio(normals),
+        }
+
+    def sample_asset_returns(self, years, n_sims, start=0):
+        """자산별 (시뮬레이션, 연도, 자산) 수익률과 포트폴리오 기여도
+
+        반환값: assets(자산 순서), returns(자산별 명목수익률), weights(연초 비중),
+        contribution(비중 x 수익률), nominal(포트폴리오 명목수익률),
+        likelihood_ratio(경로별 우도비)
+        """
+        years = np.asarray(years)
+        offsets = years - self.common.base_year
+        asset_returns, normals = self._asset_returns(offsets.max() + 1, n_sims, start)
+        portfolio, weights = self.portfolio_returns(asset_returns)
+
+        returns = asset_returns[:, offsets]
+        weights = weights[..., offsets, :]
+        return {
+            "assets": self.correlations["assets"],
+            "returns": returns,
+            "weights": weights,
+            "contribution": weights * returns,
+            "nominal": portfolio[:, offsets],
+            "likelihood_ratio": self.likelihood_ratio(normals),
+        }
+
+    def sample_strategy_returns(
+        self, years, n_sims, strategies, start=0, inflation_rate=None
+    ):
+        """여러 자산배분 전략의 (전략, 시뮬레이션, 연도) 포트폴리오 수익률
+
+        strategies: 전략별 자산배분의 리스트 (allocation_matrix의 allocation 형식)
+        inflation_rate: 실질수익률 환산용 (..., 연도) 물가상승률 (없으면 가정값)
+        모든 전략이 같은 자산별 수익률(공통난수)을 쓰므로 난수는 한 번만 뽑고
+        전략별 비중과의 축약만 전략 수만큼 한다. 전략 간 차이에는 난수 차이가
+        섞이지 않아 적은 경로로도 안정적으로 비교된다. 모듈 자신의 자산배분과
+        같은 전략은 sample_returns와 같은 수익률을 얻는다.
+        """
+        years = np.asarray(years)
+        offsets = years - self.common.base_year
+        n_years = offsets.max() + 1
+        model_years = self.common.base_year + np.arange(n_years)
+
+        asset_returns, normals = self._asset_returns(n_years, n_sims, start)
+        allocation = np.stack(
+            [self.allocation_matrix(model_years, strategy) for strategy in strategies]
+        )
+        nominal_return = self.portfolio_returns(
+            asset_returns, allocation[:, np.newaxis]
+        )[0][..., offsets]
+
+        if inflation_rate is None:
+            inflation_rate = self.common.get_inflation_rate(years)
+        real_return = (1 + nominal_return) / (1 + inflation_rate) - 1
+
+        return {
+            "nominal": nominal_return,
+            "real": real_return,
+            "likelihood_ratio": self.likelihood_ratio(normals),
+        }
+
+    def portfolio_returns(self, asset_returns, allocation=None):
+        """(..., 연도, 자산) 자산수익률 -> (포트폴리오 수익률, 연초 자산비중)
+
+        allocation: 기준연도부터의 (..., 연도, 자산) 목표 비중 (없으면
+            allocation_matrix, 앞쪽 축은 전략 등으로 브로드캐스팅)
+        annual: 매년 목표 비중으로 재조정 (수익률 x 비중 축약 한 번)
+        drift: 기준연도 목표 비중에서 출발해 자산별 수익률에 따라 비중이 표류
+        """
+        n_years = asset_returns.shape[-2]
+        if allocation is None:
+            allocation = self.allocation_matrix(
+                self.common.base_year + np.arange(n_years)
+            )
+        if self.rebalancing == "annual":
+            portfolio = np.einsum("...ta,...ta->...t", asset_returns, allocation)
+            return portfolio, allocation
+
+        shape = np.broadcast_shapes(asset_returns.shape, np.shape(allocation))
+        weights = np.empty(shape)
+        portfolio = np.empty(shape[:-1])
+        current = np.broadcast_to(allocation[..., 0, :], weights[..., 0, :].shape)
+        for t in range(n_years):
+            weights[..., t, :] = current
+            portfolio[..., t] = np.einsum(
+                "...a,...a->...", current, asset_returns[..., t, :]
+            )
+            growth = current * (1 + asset_returns[..., t, :])
+            current = growth / growth.sum(axis=-1, keepdims=True)
+        return portfolio, weights
+
+    def _asset_returns(self, n_years, n_sims, start=0):
+        """기준연도부터 n_years년의 (시뮬레이션, 연도, 자산) 자산별 명목수익률과
+        (시뮬레이션, 연도) 포트폴리오 표준정규 난수(우도비 계산용)
+
+        포트폴리오 충격(return_shocks)에 대한 회귀 성분과, 그와 독립인 잔차
+        성분(잔차 공분산의 인자 x 자산별 표준정규)의 합이다. 전체 공분산은 Σ이고,
+        연도별 목표 비중으로 합산하면 sample_returns의 annual 수익률과 같다.
+        정규가 아닌 수익률 모형이면 잔차 성분에도 같은 충격 배율을 곱한다.
+        bootstrap 모형이면 과거 수익률 표에서 뽑은 경로다(우도비용 난수는 0).
+        """
+        if self.return_model == "bootstrap":
+            return self._bootstrap_returns(n_years, n_sims, start), np.zeros(
+                (n_sims, n_years)
+            )
+
+        params = self._get_asset_params(self.common.base_year + n_years - 1)
+        normals, portfolio_shocks, scale = self._shocks(n_years, n_sims, start)
+        residual_shocks = self._block_normals(
+            2, n_years, n_sims, start, len(params["expected_returns"])
+        )
+        if scale is not None:
+            residual_shocks *= scale[..., np.newaxis]
+
+        returns = np.einsum(
+            "ntb,tab->nta", residual_shocks, params["residual_factor"][:n_years]
+        )
+        returns += params["expected_returns"]
+        returns += (
+            portfolio_shocks[..., np.newaxis] * params["portfolio_loading"][:n_years]
+        )
+        return returns, normals
 
+    def _bootstrap_returns(self, n_years, n_sims, start=0):
+        """과거 수익률 표의 정상 블록 부트스트랩 (시뮬레이션, 연도, 자산) 경로
+
+        매년 확률 1 / mean_block_length로 임의의 과거 연도에서 새 블록을 시작하고,
+        아니면 전년도 다음 연도(표 끝에서는 처음으로 순환)를 쓴다(Politis-Romano).
+        블록 시작 위치를 누적 최대값으로 전파해 모든 경로의 행 번호를 한 번에
+        구하고, 표에서 한 번의 색인으로 가져온다. 난수는 경로 블록별 하위
+        난수열(5: 새 블록 여부, 6: 시작 연도)에서 뽑는다.
+        """
+        table = self._get_historical_table()
+        n_history = len(table)
+        restart_probability = 1 / self.return_model_params["mean_block_length"]
+
+        def uniforms(stream):
+            return self._block_normals(
+                stream,
+                n_years,
+                n_sims,
+                start,
+                draw=lambda rng, shape: rng.random(shape),
+            )
+
+        restart = uniforms(5) < restart_probability
+        restart[:, 0] = True
+        first_rows = (uniforms(6) * n_history).astype(np.intp)
+
+        # 각 연도가 속한 블록의 시작 연도 위치 -> 시작 행 + 경과 연수 (순환)
+        t = np.arange(n_years)
+        block_start = np.maximum.accumulate(np.where(restart, t, 0), axis=1)
+        rows = np.take_along_axis(first_rows, block_start, axis=1)
+        rows += t - block_start
+        rows %= n_history
+        return table[rows]
+
+    def _get_historical_table(self):
+        """historical_returns -> 자산 순서(correlations["assets"])의 (연도, 자산) 배열"""
+        assets = tuple(self.correlations["assets"])
+        if self._historical_table is None or self._historical_table[0] != assets:
+            history = self.historical_returns
+            missing = [asset for asset in assets if asset not in history]
+            if missing:
+                raise ValueError(f"과거 수익률 표에 없는 자산입니다: {missing}")
+            table = np.column_stack(
+                [np.asarray(history[asset], dtype=float) for asset in assets]
+            )
+            if np.isnan(table).any():
+                raise ValueError("과거 수익률 표에 빈 값이 있습니다")
+            self._historical_table = (assets, table)
+        return self._historical_table[1]
+
+    def return_shocks(self, n_years, n_sims, start=0):
+        """경로 start ~ start + n_sims - 1, 기준연도부터 n_years년의 포트폴리오 충격
+
+        평균 0, 분산 1이며 분포는 return_model을 따른다. importance_tilt가 있으면
+        바탕 표준정규의 평균을 그만큼 옮긴 충격이다(likelihood_ratio로 보정).
+        """
+        return self._shocks(n_years, n_sims, start)[1]
+
+    def _shocks(self, n_years, n_sims, start=0):
+        """(바탕 표준정규, 포트폴리오 충격, 잔차 충격 배율) (시뮬레이션, 연도) 배열
+
+        충격 = 배율 x 표준정규 (+ 국면별 평균 이동)이며, 자산별 잔차 충격에는
+        분산이 1로 유지되는 같은 꼴의 배율을 곱한다(정규 모형이면 None). 모형별 추가 난수도 경로 블록별
+        하위 난수열(3: 카이제곱, 4: 국면 전환 균등난수)에서 뽑는다.
+        """
+        normals = self._block_normals(0, n_years, n_sims, start)
+        if self.importance_tilt:
+            normals += self._importance_tilts(n_years)
+
+        params = self.return_model_params
+        if self.return_model == "normal":
+            return normals, normals, None
+
+        if self.return_model == "student_t":
+            df = params["degrees_of_freedom"]
+            if df <= 2:
+                raise ValueError(f"t분포 자유도는 2보다 커야 합니다: {df}")
+            chi_square = self._block_normals(
+                3,
+                n_years,
+                n_sims,
+                start,
+                draw=lambda rng, shape: rng.chisquare(df, shape),
+            )
+            scale = np.sqrt((df - 2) / chi_square)
+            return normals, normals * scale, scale
+
+        if self.return_model == "regime_switching":
+            uniforms = self._block_normals(
+                4, n_years, n_sims, start, draw=lambda rng, shape: rng.random(shape)
+            )
+            transition, volatility_scale, mean_shift, residual_scale = _regime_params(
+                params
+            )
+            regimes = _regime_paths(uniforms, transition)
+            shocks = normals * volatility_scale[regimes] + mean_shift[regimes]
+            return normals, shocks, residual_scale[regimes]
+
+        # garch: σ²_t = (1 - α - β) + α ε²_{t-1} + β σ²_{t-1}, ε_t = σ_t z_t
+        alpha, beta = params["alpha"], params["beta"]
+        if alpha < 0 or beta < 0 or alpha + beta >= 1:
+            raise ValueError(
+                f"GARCH 모수가 정상성을 만족하지 않습니다: {alpha}, {beta}"
+            )
+        scale = np.empty_like(normals)
+        variance = np.ones(n_sims)
+        for t in range(n_years):
+            scale[:, t] = np.sqrt(variance)
+            variance = (
+                (1 - alpha - beta)
+                + alpha * (scale[:, t] * normals[:, t]) ** 2
+                + beta * variance
+            )
+        return normals, normals * scale, scale
+
+    def _single_shock(self, size=None):
+        """경로 번호 없는 포트폴리오 충격 (size: 독립 충격 배열 모양, 국면/GARCH는
+        정상분포에서)"""
+        shock = self._rng.standard_normal(size)
+        params = self.return_model_params
+        if self.return_model == "student_t":
+            df = params["degrees_of_freedom"]
+            shock = shock * np.sqrt((df - 2) / self._rng.chisquare(df, size))
+        elif self.return_model == "regime_switching":
+            transition, volatility_scale, mean_shift, _ = _regime_params(params)
+            regime = np.asarray(
+                self._rng.random(size) < _stationary_crisis(transition), dtype=np.intp
+            )
+            shock = shock * volatility_scale[regime] + mean_shift[regime]
+        return shock
+
+    def likelihood_ratio(self, normals):
+        """(시뮬레이션, 연도) 포트폴리오 바탕 표준정규 경로의 우도비 (원래 분포 / 옮긴 분포)
+
+        연도별 충격이 N(θ_t, 1)에서 뽑혔을 때 N(0, 1) 대비 밀도비의 곱
+        exp(-Σ θ_t z_t + Σ θ_t² / 2)이다. 가중 평균/분위수는 이 값을 경로
+        가중치로 쓴다.
+        """
+        tilts = self._importance_tilts(normals.shape[-1])
+        return np.exp(-(normals @ tilts) + tilts @ tilts / 2)
+
+    def _importance_tilts(self, n_years):
+        """기준연도부터 n_years년의 연도별 충격 평균 이동량 θ_t"""
+        years = self.common.base_year + np.arange(n_years)
+        end_year = self.importance_end_year
+        if end_year is None:
+            return np.full(n_years, float(self.importance_tilt))
+        return np.where(years <= end_year, float(self.importance_tilt), 0.0)
+
+    def _block_normals(
+        self, stream, n_years, n_sims, start=0, n_assets=None, draw=None
+    ):
+        """(시뮬레이션, 연도[, 자산]) 표준정규 난수 (draw(rng, 모양)이 있으면 그 난수)
+
+        경로를 block_size개씩 묶어 블록마다 SeedSequence 하위 난수열
+        (stream, 블록 번호)을 쓰고 블록 안에서는 (연도, 경로[, 자산]) 순서로
+        뽑으므로, 경로 구간을 나눠 뽑든(병렬 분할) 추계기간을 늘리든 같은
+        경로/연도의 값은 비트 단위로 같다.
+
+        antithetic이면 블록 안의 경로 (2i, 2i + 1)이 부호만 반대인 충격을 쓰고,
+        sobol이면 블록마다 (연도 x 자산)차원 스크램블 소볼 점 block_size개를
+        역정규분포로 변환한다(블록이 독립 반복이 됨). 소볼 점은 차원(추계기간)에
+        따라 달라지므로 추계기간을 바꾸면 값도 바뀐다.
+        """
+        extra = () if n_assets is None else (n_assets,)
+        normals_out = np.empty((n_sims, n_years) + extra)
+        stop = start + n_sims
+        for block in range(start // self.block_size, -(-stop // self.block_size)):
+            block_start = block * self.block_size
+            rng = np.random.default_rng(child_seed(self.seed_sequence, stream, block))
+            shape = (n_years, self.block_size) + extra
+            normals = (draw or self._draw_block)(rng, shape)
+
+            lo = max(start, block_start)
+            hi = min(stop, block_start + self.block_size)
+            normals_out[lo - start : hi - start] = np.swapaxes(
+                normals[:, lo - block_start : hi - block_start], 0, 1
+            )
+        return normals_out
+
+    def _draw_block(self, rng, shape):
+        """블록 하나의 (연도, 경로[, 자산]) 표준정규 난수 (variance_reduction 적용)"""
+        if self.variance_reduction is None:
+            return rng.standard_normal(shape)
+
+        if self.variance_reduction == "antithetic":
+            half = rng.standard_normal((shape[0], shape[1] // 2) + shape[2:])
+            normals = np.empty(shape)
+            normals[:, 0::2] = half
+            normals[:, 1::2] = -half
+            return normals
+
+        from scipy.stats import norm, qmc  # 소볼 수열을 쓸 때만 불러온다
+
+        n_years, n_paths = shape[:2]
+        dimension = int(np.prod(shape)) // n_paths
+        points = qmc.Sobol(dimension, scramble=True, seed=rng).random(n_paths)
+        tiny = np.finfo(float).tiny
+        normals = norm.ppf(np.clip(points, tiny, 1 - np.finfo(float).epsneg))
+        normals = normals.reshape((n_paths, n_years) + shape[2:])
+        return np.swapaxes(normals, 0, 1)
+
+    def estimator_group_size(self):
+        """표준오차 계산에서 서로 독립인 경로 묶음의 크기
+
+        대조변량은 (2i, 2i + 1) 쌍, 소볼 수열은 블록 하나가 독립 반복이다.
+        """
+        return {None: 1, "antithetic": 2, "sobol": self.block_size}[
+            self.variance_reduction
+        ]
+
+    def estimate_mean(self, values, control=None, control_mean=None):
+        """(시뮬레이션, ...) 값의 경로 평균 추정치와 표준오차
+
+        독립 경로 묶음(estimator_group_size)의 평균을 표본으로 표준오차를
+        계산하며, 마지막의 불완전한 묶음은 표준오차 계산에서 뺀다. control과
+        그 기댓값 control_mean이 주어지면 통제변량 추정치
+        mean(Y) - β(mean(X) - E[X]) (β: 묶음 평균의 회귀계수)를 쓴다.
+        반환값: {"mean", "standard_error"} (values[0]과 같은 모양)
+        """
+        values = np.asarray(values, dtype=float)
+        group_size = self.estimator_group_size()
+        n_groups = len(values) // group_size
+
+        def group_means(x):
+            x = np.asarray(x, dtype=float)[: n_groups * group_size]
+            return x.reshape((n_groups, group_size) + x.shape[1:]).mean(axis=1)
+
+        mean = values.mean(axis=0)
+        samples = group_means(values)
+        if control is not None:
+            control_samples = group_means(control)
+            centered = control_samples - control_samples.mean(axis=0)
+            variance = (centered**2).sum(axis=0)
+            beta = np.divide(
+                (centered * (samples - samples.mean(axis=0))).sum(axis=0),
+                variance,
+                out=np.zeros_like(mean),
+                where=variance > 0,
+            )
+            mean = mean - beta * (np.mean(control, axis=0) - control_mean)
+            samples = samples - beta * control_samples
+
+        if n_groups < 2:
+            standard_error = np.full_like(mean, np.nan)
+        else:
+            standard_error = samples.std(axis=0, ddof=1) / np.sqrt(n_groups)
+        return {"mean": mean, "standard_error": standard_error}
+
+    def cumulative_return_control(self, years, real_returns):
+        """(시뮬레이션, 연도) 실질수익률의 누적 배수와 그 기댓값 (통제변량)
+
+        연도별 수익률의 평균이 비중 x 기대수익률이고 연도 간 상관이 없으며
+        물가가 가정값이면 누적 배수의 기댓값은 결정론적 경로(기대수익률)의
+        누적 배수와 같다. 이 조건이 깨지는 drift 리밸런싱/국면전환/bootstrap
+        모형은 생성자에서 거부하고, 경제 시나리오/동적 자산배분이면
+        NationalPensionModel이 통제변량을 쓰지 않는다.
+        """
+        expected_returns = self.calculate_nominal_portfolio_return(np.asarray(years))
+        inflation_rate = self.common.get_inflation_rate(years)
+        expected_real = (1 + expected_returns) / (1 + inflation_rate) - 1
+        return np.cumprod(1 + real_returns, axis=-1), np.cumprod(1 + expected_real)
+
+    def _get_asset_params(self, end_year=None):
+        """기준연도 ~ end_year의 자산별/연도별 배열 (가정이 바뀌면 다시 계산)
+
+        자산 순서는 correlations["assets"]이다.
+            expected_returns, volatilities, covariance: 자산별 가정
+            allocation: (연도, 자산) 목표 비중
+            portfolio_return, portfolio_volatility: 연도별 w_t'μ, sqrt(w_t'Σw_t)
+            portfolio_loading: (연도, 자산) Σw_t / sqrt(w_t'Σw_t)
+            residual_factor: (연도, 자산, 자산) 잔차 공분산 Σ - loading loading'의 인자
+        """
+        base_year = self.common.base_year
+        end_year = base_year if end_year is None else int(np.max(end_year))
         assets = self.correlations["assets"]
-        corr_matrix = self.correlations["matrix"]
-        n_assets = len(assets)
+        corr_matrix = np.asarray(self.correlations["matrix"], dtype=float)
+        key = (
+            tuple(assets),
+            tuple(sorted(self.asset_allocation.items())),
+            _allocation_key(self.allocation_schedule),
+            tuple(self.expected_returns.get(asset, 0.0) for asset in assets),
+            tuple(self.volatilities.get(asset, 0.0) for asset in assets),
+            corr_matrix.tobytes(),
+        )
+        if (
+            self._asset_params is None
+            or self._asset_params[0] != key
+            or end_year > self._asset_params[1]
+        ):
+            end_year = max(end_year, self.common.horizon_end)
+            self._asset_params = (
+                key,
+                end_year,
+                self._build_asset_params(
+                    np.arange(base_year, end_year + 1), key[3], key[4], corr_matrix
+                ),
+            )
+        return self._asset_params[2]
+
+    def _build_asset_params(self, years, expected_returns, vols, corr_matrix):
+        expected_returns = np.array(expected_returns)
+        vols = np.array(vols)
+        covariance = corr_matrix * np.outer(vols, vols)
+
+        allocation = self.allocation_matrix(years)
+        weighted = allocation @ covariance  # Σw_t (공분산은 대칭)
+        portfolio_variance = np.einsum("ta,ta->t", weighted, allocation)
+        portfolio_volatility = np.sqrt(np.clip(portfolio_variance, 0, None))
+
+        # 자산수익률 = 기대수익률 + loading x 포트폴리오 충격 + 잔차
+        loading = np.divide(
+            weighted,
+            portfolio_volatility[:, np.newaxis],
+            out=np.zeros_like(weighted),
+            where=portfolio_volatility[:, np.newaxis] > 0,
+        )
+        residual = covariance - loading[:, :, np.newaxis] * loading[:, np.newaxis, :]
+
+        return {
+            "expected_returns": expected_returns,
+            "volatilities": vols,
+            "covariance": covariance,
+            "allocation": allocation,
+            "portfolio_return": allocation @ expected_returns,
+            "portfolio_volatility": portfolio_volatility,
+            "portfolio_loading": loading,
+            "residual_factor": _covariance_factor(residual),
+        }
+
+    def calculate_portfolio_volatility(self, year=None):
+        """자산배분 비중의 포트폴리오 변동성 sqrt(w' Σ w) (year: 연도별 자산배분)"""
+        year = self.common.base_year if year is None else year
+        params = self._get_asset_params(year)
+        return params["portfolio_volatility"][np.asarray(year) - self.common.base_year]
+
+
+class RuleBasedReturns:
+    """재정상태에 따라 연도별 비중을 정하는 경로별 포트폴리오 수익률
+
+    FinanceModule.project_horizon이 매년 step(연도 위치, 재정상태)을 호출해
+    그 해 (시뮬레이션,) 실질수익률을 받는다. 모든 경로를 배열로 함께
+    처리하며, 적용된 비중과 명목수익률은 weights/nominal에 기록된다.
+    """
+
+    def __init__(
+        self,
+        years,
+        asset_returns,
+        allocation,
+        inflation_rate,
+        rules,
+        rebalancing,
+        likelihood_ratio,
+    ):
+        self.years = years
+        self.asset_returns = asset_returns  # (시뮬레이션, 연도, 자산)
+        self.allocation = allocation  # (연도, 자산) 목표 비중
+        self.inflation_rate = inflation_rate  # (시뮬레이션, 연도)
+        self.rules = rules
+        self.rebalancing = rebalancing
+        self.likelihood_ratio = likelihood_ratio  # (시뮬레이션,) 경로별 우도비
+        self.shape = asset_returns.shape[:2]
+        self.weights = np.empty(asset_returns.shape)
+        self.nominal = np.empty(self.shape)
+
+    def step(self, t, state):
+        """t번째 연도의 비중을 정하고 (시뮬레이션,) 실질수익률을 반환"""
+        returns = self.asset_returns[:, t]
+        if self.rebalancing == "annual" or t == 0:
+            weights = np.broadcast_to(self.allocation[t], returns.shape)
+        else:
+            # drift: 전년도 비중이 수익률에 따라 표류한 비중에서 출발
+            weights = self.weights[:, t - 1] * (1 + self.asset_returns[:, t - 1])
+            weights /= weights.sum(axis=-1, keepdims=True)
+
+        for rule in self.rules:
+            weights = rule(self.years[t], state, weights)
+
+        self.weights[:, t] = weights
+        nominal = np.einsum("na,na->n", self.weights[:, t], returns)
+        self.nominal[:, t] = nominal
+        return (1 + nominal) / (1 + self.inflation_rate[:, t]) - 1
+
+
+def _sobol_block_size(simulation_number, min_blocks=8):
+    """소볼 블록 크기: 독립 블록이 min_blocks개 이상 되는 가장 큰 2의 거듭제곱
+
+    블록 하나가 표준오차 계산의 독립 반복이므로 경로 수에 맞춰 정한다
+    (경로 수를 모르면 1024).
+    """
+    if not simulation_number:
+        return 1024
+    return 1 << max(int(simulation_number // min_blocks).bit_length() - 1, 0)
+
+
+def _stationary_crisis(transition):
+    """2상태 마르코프 국면의 정상분포에서 위기(1) 국면 확률"""
+    to_crisis, to_calm = transition[0, 1], transition[1, 0]
+    return to_crisis / (to_crisis + to_calm)
+
+
+def _regime_params(params):
+    """국면 모수 -> (전이행렬, 변동성 배율, 평균 이동, 잔차 변동성 배율)
+
+    정상분포에서 충격의 평균이 0, 분산이 1이 되도록 평균 이동은 가중평균을
+    빼고 변동성 배율은 공통 상수로 조정한다. 평균 이동이 없는 잔차 충격의
+    배율은 그 자체로 분산이 1이 되게 조정한다.
+    """
+    transition = np.asarray(params["transition"], dtype=float)
+    volatility_scale = np.asarray(params["volatility_scale"], dtype=float)
+    mean_shift = np.asarray(params["mean_shift"], dtype=float)
+
+    crisis = _stationary_crisis(transition)
+    stationary = np.array([1 - crisis, crisis])
+    mean_shift = mean_shift - stationary @ mean_shift
+    remaining = 1 - stationary @ mean_shift**2
+    if remaining <= 0:
+        raise ValueError("국면별 평균 이동이 너무 커서 분산을 1로 맞출 수 없습니다")
+    residual_scale = volatility_scale / np.sqrt(stationary @ volatility_scale**2)
+    return transition, residual_scale * np.sqrt(remaining), mean_shift, residual_scale
+
+
+def _regime_paths(uniforms, transition):
+    """(시뮬레이션, 연도) 균등난수 -> 국면(0: 평상, 1: 위기) 경로
+
+    첫 해는 정상분포에서, 이후는 전이확률로 모든 경로를 함께 전진한다.
+    """
+    regimes = np.empty(uniforms.shape, dtype=np.intp)
+    regimes[:, 0] = uniforms[:, 0] < _stationary_crisis(transition)
+    switch = np.array([transition[0, 1], transition[1, 0]])
+    for t in range(1, uniforms.shape[1]):
+        previous = regimes[:, t - 1]
+        regimes[:, t] = np.where(
+            uniforms[:, t] < switch[previous], 1 - previous, previous
+        )
+    return regimes
+
+
+def _allocation_key(allocation_schedule):
+    if allocation_schedule is None:
+        return None
+    return tuple(
+        (year, tuple(sorted(weights.items())))
+        for year, weights in sorted(allocation_schedule.items())
+    )
+
+
+def _covariance_factor(covariance):
+    """(..., n, n) 공분산의 인자 L (covariance = L @ L.T)
 
-        # 가중치 벡터 생성
-        weights = np.zeros(n_assets)
-        for i, asset in enumerate(assets):
-            if asset in self.asset_allocation:
-                weights[i] = self.asset_allocation[asset]
-
-        # 변동성 벡터 생성
-        vols = np.zeros(n_assets)
-        for i, asset in enumerate(assets):
-            if asset in self.volatilities:
-                vols[i] = self.volatilities[asset]
-
-        # 공분산 행렬 생성
-        cov_matrix = np.zeros((n_assets, n_assets))
-        for i in range(n_assets):
-            for j in range(n_assets):
-                cov_matrix[i, j] = corr_matrix[i, j] * vols[i] * vols[j]
-
-        # 포트폴리오 변동성 계산
-        portfolio_variance = np.dot(weights.T, np.dot(cov_matrix, weights))
-        portfolio_volatility = np.sqrt(portfolio_variance)
-
-        return portfolio_volatility
+    양의 정부호면 촐레스키 분해, 아니면(변동성 0인 자산, 잔차 공분산 등
+    양의 준정부호) 고유분해로 계산한다.
+    """
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))[..., np.newaxis, :]
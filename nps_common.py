@@ -1,36 +1,241 @@
+import itertools
+
 import numpy as np
 
 
+class Schedule(dict):
+    """연도별 가정값 {연도: 값}
+
+    사이 연도는 선형보간하고 처음/마지막 연도 밖은 양끝 값을 유지한다.
+    보간 절점(정렬된 연도/값 배열)은 한 번만 만들고, 구간 전체 값도 캐시하며
+    항목을 수정하면 모두 무효화되고 새 version(모든 Schedule에서 유일)을 받는다.
+    """
+
+    _versions = itertools.count()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._invalidate()
+
+    def _invalidate(self):
+        self.version = next(Schedule._versions)
+        self._knots = None
+        self._horizon = None
+
+    def __setitem__(self, year, value):
+        super().__setitem__(year, value)
+        self._invalidate()
+
+    def __delitem__(self, year):
+        super().__delitem__(year)
+        self._invalidate()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._invalidate()
+
+    def setdefault(self, year, value=None):
+        if year not in self:
+            self[year] = value
+        return self[year]
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._invalidate()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._invalidate()
+        return item
+
+    def clear(self):
+        super().clear()
+        self._invalidate()
+
+    def copy(self):
+        return Schedule(self)
+
+    @property
+    def knots(self):
+        """정렬된 (연도 배열, 값 배열)"""
+        if self._knots is None:
+            years = np.array(sorted(self), dtype=float)
+            values = np.array([self[y] for y in sorted(self)], dtype=float)
+            self._knots = (years, values)
+        return self._knots
+
+    def __call__(self, year):
+        """특정 연도(스칼라 또는 배열)의 값"""
+        if self._horizon is not None and np.ndim(year) == 0:
+            start_year, values = self._horizon
+            idx = int(year) - start_year
+            if idx == year - start_year and 0 <= idx < len(values):
+                return values[idx]
+        return np.interp(year, *self.knots)
+
+    def horizon(self, start_year, end_year):
+        """start_year ~ end_year의 연도별 값 배열 (캐시, 읽기전용)"""
+        if self._horizon is not None:
+            cached_start, values = self._horizon
+            if cached_start <= start_year and end_year < cached_start + len(values):
+                return values[start_year - cached_start : end_year - cached_start + 1]
+
+        if self._horizon is not None:
+            start_year = min(start_year, self._horizon[0])
+            end_year = max(end_year, self._horizon[0] + len(self._horizon[1]) - 1)
+        values = np.interp(np.arange(start_year, end_year + 1), *self.knots)
+        values.flags.writeable = False
+        self._horizon = (start_year, values)
+        return values
+
+
+def get_schedule(params, name):
+    """params[name]을 Schedule로 반환 (일반 dict로 교체된 경우 변환해 저장)"""
+    schedule = params[name]
+    if not isinstance(schedule, Schedule):
+        schedule = params[name] = Schedule(schedule)
+    return schedule
+
+
+def params_version(params):
+    """params의 현재 상태를 나타내는 키 (파생값 캐시 무효화 판단용)
+
+    Schedule은 version으로, 그 밖의 값은 내용으로 비교한다.
+    """
+    key = []
+    for name, value in sorted(params.items()):
+        if isinstance(value, Schedule):
+            key.append((name, value.version))
+        elif isinstance(value, dict):
+            key.append((name, tuple(sorted(value.items()))))
+        else:
+            key.append((name, value))
+    return tuple(key)
+
+
+def child_seed(seed_sequence, *key):
+    """seed_sequence의 key 위치 하위 SeedSequence
+
+    spawn()과 달리 호출 순서와 무관하게 key만으로 정해지므로, 같은 key를
+    어느 프로세스에서 만들어도 같은 난수열을 얻는다.
+    """
+    return np.random.SeedSequence(
+        seed_sequence.entropy,
+        spawn_key=tuple(seed_sequence.spawn_key) + key,
+        pool_size=seed_sequence.pool_size,
+    )
+
+
+def weighted_quantile(values, q, weights=None):
+    """(경로, ...) 값의 경로축 분위수 (q: 0~1 스칼라 또는 배열)
+
+    weights(경로별 가중치, 중요도 표본추출의 우도비 등)가 없거나 모두 같으면
+    np.quantile과 같고, 아니면 가중 누적분포가 처음 q 이상이 되는 값이다.
+    """
+    if weights is None or np.all(weights == np.ravel(weights)[0]):
+        return np.quantile(values, q, axis=0)
+
+    values = np.asarray(values)
+    order = np.argsort(values, axis=0)
+    sorted_values = np.take_along_axis(values, order, axis=0)
+    weights = np.asarray(weights, dtype=float).reshape((-1,) + (1,) * (values.ndim - 1))
+    weights = np.take_along_axis(np.broadcast_to(weights, values.shape), order, axis=0)
+    cumulative = np.cumsum(weights, axis=0)
+    cumulative /= cumulative[-1]
+
+    q = np.asarray(q, dtype=float)
+    quantiles = [
+        np.take_along_axis(
+            sorted_values,
+            np.minimum((cumulative < level).sum(axis=0), len(values) - 1)[np.newaxis],
+            axis=0,
+        )[0]
+        for level in q.ravel()
+    ]
+    return np.reshape(quantiles, q.shape + values.shape[1:])
+
+
 class NPSCommon:
     def __init__(self):
 
         self.common_params = {
-            "inflation_rate": {  # 물가상승률 보고서 p11
-                2023: 0.02,
-                2024: 0.02,
-                2025: 0.02,
-                2026: 0.02,
-                2027: 0.02,
-                2030: 0.02,
-                2040: 0.02,
-                2050: 0.02,
-                2060: 0.02,
-            }
+            "inflation_rate": Schedule(
+                {  # 물가상승률 보고서 p11
+                    2023: 0.02,
+                    2024: 0.02,
+                    2025: 0.02,
+                    2026: 0.02,
+                    2027: 0.02,
+                    2030: 0.02,
+                    2040: 0.02,
+                    2050: 0.02,
+                    2060: 0.02,
+                }
+            )
         }
 
+        self.base_year = 2023
+        self.horizon_end = 2093  # 기본 추계기간 (더 먼 연도를 요청하면 확장)
+
+        # 누적물가지수 캐시: (물가상승률 version, 시작연도, 지수 배열)
+        self._price_index = None
+
     def get_inflation_rate(self, year):
         # 실질 물가 상승률률
-        years = sorted(self.common_params["inflation_rate"].keys())
-        rates = [self.common_params["inflation_rate"][y] for y in years]
-
-        if year >= years[-1]:
-            return rates[-1]
-        return np.interp(year, years, rates)
+        return get_schedule(self.common_params, "inflation_rate")(year)
 
     def get_cumulative_inflation(self, base_year, target_year):
+        """base_year 대비 target_year의 누적 물가상승 배수
+
+        전체 추계기간의 누적물가지수 P를 한 번 계산해 두고 P[target] / P[base]로
+        조회한다. base_year/target_year는 스칼라 또는 배열(브로드캐스팅)이다.
+        """
+        base_year = np.asarray(base_year)
+        target_year = np.asarray(target_year)
+        start_year, index = self._get_price_index(
+            min(base_year.min(), target_year.min()),
+            max(base_year.max(), target_year.max()),
+        )
+        return index[target_year - start_year] / index[base_year - start_year]
+
+    def price_index(self, start_year, end_year, inflation_paths=None):
+        """start_year = 1 기준 누적물가지수 (start_year ~ end_year)
+
+        inflation_paths가 주어지면 (..., 연도) 모양의 시나리오별 물가상승률 경로
+        (start_year부터)로 시나리오별 지수를 계산한다. 첫 해는 1이고
+        다음 연도부터 해당 연도 물가상승률을 누적한다.
+        """
+        if inflation_paths is None:
+            cached_start, index = self._get_price_index(start_year, end_year)
+            index = index[start_year - cached_start : end_year - cached_start + 1]
+            return index / index[0]
+
+        rates = np.asarray(inflation_paths)[..., : end_year - start_year + 1]
+        index = np.ones(rates.shape)
+        index[..., 1:] = np.cumprod(1 + rates[..., 1:], axis=-1)
+        return index
+
+    def _get_price_index(self, start_year, end_year):
+        """누적물가지수 배열을 (필요하면 다시) 계산해 (시작연도, 배열)로 반환"""
+        schedule = get_schedule(self.common_params, "inflation_rate")
+        if self._price_index is not None:
+            version, cached_start, index = self._price_index
+            cached_end = cached_start + len(index) - 1
+            if version == schedule.version:
+                if cached_start <= start_year and end_year <= cached_end:
+                    return cached_start, index
+                start_year = min(start_year, cached_start)
+                end_year = max(end_year, 2 * cached_end - cached_start)
 
-        cumulative = 1.0
-        for year in range(base_year + 1, target_year + 1):
-            inflation_rate = self.get_inflation_rate(year)
-            cumulative *= 1 + inflation_rate
-        return cumulative
+        start_year = int(min(start_year, self.base_year))
+        end_year = int(max(end_year, self.horizon_end))
+        # P[y] = (1 + r_start) x ... x (1 + r_y), 비율 P[t] / P[b]에서 앞부분은 상쇄됨
+        index = np.cumprod(1 + schedule.horizon(start_year, end_year))
+        index.flags.writeable = False
+        self._price_index = (schedule.version, start_year, index)
+        return start_year, index
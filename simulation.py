@@ -1,5 +1,7 @@
 from NPS_model import NationalPensionModel
 from visualization import create_simulation_visualizations
+from concurrent.futures import ProcessPoolExecutor
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -17,33 +19,8 @@ def run_single_simulation(contribution_rate, income_replacement):
     model.finance.params["contribution_rate"] = contribution_rate
     model.benefit.params["income_replacement"] = income_replacement
 
-    # 시뮬레이션 실행
-    results = []
-    for year in range(model.start_year, model.end_year + 1):
-        # 1. 인구추계
-        population_data = model.demographic.project_population(year)
-
-        # 2. 거시경제변수 추계
-        economic_vars = model.economic.project_variables(year)
-
-        # 3. 가입자 추계
-        subscribers = model.subscriber.project_subscribers(
-            year, population_data["population_structure"]
-        )
-
-        # 4. 급여지출 추계
-        benefits = model.benefit.project_benefits(
-            year,
-            population_data["population_structure"],
-            subscribers,
-        )
-
-        # 5. 재정수지 추계
-        financial_status = model.finance.project_balance(
-            year, subscribers, benefits, economic_vars
-        )
-
-        results.append(financial_status)
+    # 시뮬레이션 실행 (재정수지는 전체 추계기간 배열로 한 번에 계산)
+    results = model.run_projection()["financial_results"]
 
     # 결과 분석
     df = pd.DataFrame(results)
@@ -194,7 +171,46 @@ def test_simulation():
     print(f"기금 소진: {result_higher_contribution['depletion_year']}년")
 
 
-def run_multiple_simulations():
+def _run_grid_cell(rates):
+    """격자 한 칸의 시뮬레이션 (작업 프로세스에서 실행, 실패해도 결과 행 반환)"""
+    cont_rate, inc_replace = rates
+    print(
+        f"Running simulation for contribution rate: {cont_rate * 100:.0f}%, income replacement: {inc_replace * 100:.0f}%"
+    )
+    row = {
+        "contribution_rate": cont_rate * 100,  # 퍼센트로 변환
+        "income_replacement": inc_replace * 100,  # 퍼센트로 변환
+        "max_reserve": None,
+        "max_reserve_year": None,
+        "first_deficit_year": None,
+        "depletion_year": None,
+        "error": None,
+    }
+    try:
+        result = run_pension_simulation(cont_rate, inc_replace, sensitivity=False)
+    except Exception as e:  # 한 칸의 실패가 전체 격자를 멈추지 않도록 기록만 함
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+
+    for name in (
+        "max_reserve",
+        "max_reserve_year",
+        "first_deficit_year",
+        "depletion_year",
+    ):
+        row[name] = result[name]
+    return row
+
+
+def run_multiple_simulations(max_workers=None, chunksize=None):
+    """보험료율 x 소득대체율 격자를 프로세스 풀에서 병렬로 시뮬레이션
+
+    max_workers: 작업 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 순차 실행)
+    chunksize: 작업 프로세스에 한 번에 넘기는 격자 칸 수
+        (None이면 작업 프로세스당 약 4묶음이 되도록)
+    결과는 격자 순서(보험료율, 소득대체율 순)로 모으며, 실패한 칸은 값이 비고
+    error 열에 예외 내용이 남는다 (실패가 없으면 error 열은 없음).
+    """
 
     # 시뮬레이션할 보험료율과 소득대체율 조합
     contribution_rates = [
@@ -203,31 +219,34 @@ def run_multiple_simulations():
     income_replacements = [
         round(x, 2) for x in np.arange(0.40, 0.51, 0.01)
     ]  # 40%부터 0.01씩 증가하여 50%까지
-
-    results = []
-
-    for cont_rate in contribution_rates:
-        for inc_replace in income_replacements:
-            # 시뮬레이션 실행
+    grid = [
+        (cont_rate, inc_replace)
+        for cont_rate in contribution_rates
+        for inc_replace in income_replacements
+    ]
+
+    if max_workers == 1:
+        results = [_run_grid_cell(rates) for rates in grid]
+    else:
+        workers = max_workers or os.cpu_count() or 1
+        if chunksize is None:
+            chunksize = max(1, -(-len(grid) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map은 제출 순서(격자 순서)대로 결과를 돌려준다
+            results = list(executor.map(_run_grid_cell, grid, chunksize=chunksize))
+
+    failed = [row for row in results if row["error"] is not None]
+    if failed:
+        print(f"\n{len(failed)}개 격자 칸의 시뮬레이션이 실패했습니다:")
+        for row in failed:
             print(
-                f"Running simulation for contribution rate: {cont_rate * 100:.0f}%, income replacement: {inc_replace * 100:.0f}%"
-            )
-
-            result = run_pension_simulation(cont_rate, inc_replace, sensitivity=False)
-            # 결과 저장
-            results.append(
-                {
-                    "contribution_rate": cont_rate * 100,  # 퍼센트로 변환
-                    "income_replacement": inc_replace * 100,  # 퍼센트로 변환
-                    "max_reserve": result["max_reserve"],
-                    "max_reserve_year": result["max_reserve_year"],
-                    "first_deficit_year": result["first_deficit_year"],
-                    "depletion_year": result["depletion_year"],
-                }
+                f"  보험료율 {row['contribution_rate']:.0f}%, 소득대체율 {row['income_replacement']:.0f}%: {row['error']}"
             )
 
-    # DataFrame 생성
+    # DataFrame 생성 (실패한 칸이 없으면 error 열은 넣지 않음)
     df_results = pd.DataFrame(results)
+    if not failed:
+        df_results = df_results.drop(columns="error")
 
     # 결과 출력
     print("\n연금 재정 시뮬레이션 결과:")
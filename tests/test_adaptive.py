@@ -0,0 +1,31 @@
+import numpy as np
+
+from NPS_model import NationalPensionModel
+
+
+def test_zero_batch_standard_error_is_not_converged():
+    # 수익률 변동성이 0이면 모든 경로의 소진연도가 같아 묶음 표준오차가 0
+    model = NationalPensionModel(stochastic=True, seed=1)
+    model.investment.volatilities = dict.fromkeys(model.investment.volatilities, 0.0)
+
+    result = model.run_adaptive(
+        {"median_depletion_year": 5}, batch_size=100, max_sims=500
+    )
+
+    statistic = result["statistics"]["median_depletion_year"]
+    assert statistic["standard_error"] == 0
+    assert not result["converged"]
+    assert result["n_sims"] == 500
+
+
+def test_half_width_uses_student_t_quantile():
+    model = NationalPensionModel(stochastic=True, seed=1)
+
+    result = model.run_adaptive(
+        {"reserve_p5": np.inf}, batch_size=100, max_sims=300, min_batches=3
+    )
+
+    statistic = result["statistics"]["reserve_p5"]
+    assert result["converged"]
+    # 자유도 2, 95% 양측 t 분위수
+    assert np.isclose(statistic["half_width"], 4.302653 * statistic["standard_error"])
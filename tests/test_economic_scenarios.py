@@ -0,0 +1,58 @@
+import numpy as np
+
+from NPS_model import NationalPensionModel
+
+FINANCE_ITEMS = (
+    "nominal_revenue",
+    "nominal_expenditure",
+    "real_balance",
+    "nominal_reserve_fund",
+    "real_reserve_fund",
+    "fund_ratio",
+    "nominal_gdp",
+)
+
+
+def _without_volatility(model):
+    for name in model.economic.scenario_params:
+        if name.endswith("_volatility"):
+            model.economic.scenario_params[name] = 0.0
+    model.investment.volatilities = dict.fromkeys(model.investment.volatilities, 0.0)
+    return model
+
+
+def test_zero_volatility_economy_reproduces_deterministic_path():
+    deterministic = _without_volatility(NationalPensionModel()).run_projection()
+    expected = {
+        name: np.array([row[name] for row in deterministic["financial_results"]])
+        for name in FINANCE_ITEMS
+    }
+
+    model = _without_volatility(
+        NationalPensionModel(
+            stochastic=True, simulation_number=20, seed=1, stochastic_economy=True
+        )
+    )
+    results = model.run_projection()["financial_results"]
+
+    for name in FINANCE_ITEMS:
+        np.testing.assert_allclose(
+            results[name],
+            np.broadcast_to(expected[name], results[name].shape),
+            rtol=1e-9,
+            err_msg=name,
+        )
+
+
+def test_economy_without_macro_volatility_matches_plain_stochastic_run():
+    plain = NationalPensionModel(stochastic=True, simulation_number=200, seed=3)
+    model = NationalPensionModel(
+        stochastic=True, simulation_number=200, seed=3, stochastic_economy=True
+    )
+    for name in model.economic.scenario_params:
+        if name.endswith("_volatility"):
+            model.economic.scenario_params[name] = 0.0
+
+    expected = plain.run_projection()["financial_results"]["nominal_reserve_fund"]
+    results = model.run_projection()["financial_results"]["nominal_reserve_fund"]
+    np.testing.assert_allclose(results, expected, rtol=1e-9)
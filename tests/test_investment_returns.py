@@ -0,0 +1,27 @@
+import numpy as np
+
+from investment_module import InvestmentModule
+from nps_common import NPSCommon
+
+
+def test_deterministic_returns_follow_year_shape():
+    investment = InvestmentModule(NPSCommon())
+    years = np.arange(2023, 2030)
+
+    returns = investment.get_investment_returns(years)
+    assert np.shape(returns["nominal"]) == years.shape
+    assert np.shape(returns["real"]) == years.shape
+
+
+def test_path_returns_match_sample_returns():
+    investment = InvestmentModule(
+        NPSCommon(), stochastic=True, simulation_number=200, seed=3, block_size=64
+    )
+    years = np.arange(2023, 2094)
+    expected = investment.sample_returns(years, 200)["nominal"]
+
+    for path in (0, 5, 70, 199):
+        returns = investment.get_investment_returns(years, simulation_index=path)
+        np.testing.assert_array_equal(returns["nominal"], expected[path])
+        scalar = investment.get_investment_returns(2030, simulation_index=path)
+        assert scalar["nominal"] == expected[path, 7]
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from NPS_model import NationalPensionModel
+from investment_module import InvestmentModule
+from nps_common import NPSCommon
+
+
+def test_sobol_default_run_reports_standard_error():
+    model = NationalPensionModel(
+        stochastic=True, simulation_number=1000, seed=1, variance_reduction="sobol"
+    )
+    assert model.investment.block_size == 64
+
+    estimates = model.run_projection()["estimates"]
+    for estimate in estimates.values():
+        assert np.isfinite(estimate["standard_error"]).all()
+
+
+def test_sobol_block_size_without_two_blocks_raises():
+    with pytest.raises(ValueError):
+        InvestmentModule(
+            NPSCommon(),
+            stochastic=True,
+            simulation_number=1000,
+            variance_reduction="sobol",
+            block_size=1024,
+        )
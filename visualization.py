@@ -2,6 +2,7 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
+from nps_common import weighted_quantile
 import seaborn as sns
 import matplotlib.font_manager as fm
 
@@ -343,44 +344,43 @@ def save_stochastic_result_to_csv(rs, timestamp=None, title=""):
         index=False,
     )
 
-    # 연도별 통계 데이터 준비
-    years = sorted(
-        set([result["year"] for sim in rs["financial_results"] for result in sim])
+    # 연도별 통계 데이터 준비 (결과는 항목별 (시뮬레이션, 연도) 행렬)
+    # 중요도 표본추출이면 경로별 우도비로 가중한 통계
+    results = rs["financial_results"]
+    years = results["year"]
+    reserves = results["nominal_reserve_fund"]
+    balances = results["nominal_balance"]
+    weights = results.get("likelihood_ratio")
+
+    p5_reserve, median_reserve, p95_reserve = weighted_quantile(
+        reserves, [0.05, 0.5, 0.95], weights
+    )
+    p5_balance, median_balance, p95_balance = weighted_quantile(
+        balances, [0.05, 0.5, 0.95], weights
     )
     stats_data = {
         "year": years,
-        "mean_reserve": [],
-        "median_reserve": [],
-        "p5_reserve": [],
-        "p95_reserve": [],
-        "mean_balance": [],
-        "median_balance": [],
-        "p5_balance": [],
-        "p95_balance": [],
+        "mean_reserve": np.average(reserves, axis=0, weights=weights),
+        "median_reserve": median_reserve,
+        "p5_reserve": p5_reserve,
+        "p95_reserve": p95_reserve,
+        "mean_balance": np.average(balances, axis=0, weights=weights),
+        "median_balance": median_balance,
+        "p5_balance": p5_balance,
+        "p95_balance": p95_balance,
     }
 
-    # 연도별 결과 분석
-    for year in years:
-        # 해당 연도의 모든 시뮬레이션 결과 수집
-        year_reserves = []
-        year_balances = []
-
-        for sim in rs["financial_results"]:
-            for result in sim:
-                if result["year"] == year:
-                    year_reserves.append(result["nominal_reserve_fund"])
-                    year_balances.append(result["nominal_balance"])
-                    break
-
-        # 통계 계산
-        stats_data["mean_reserve"].append(np.mean(year_reserves))
-        stats_data["median_reserve"].append(np.median(year_reserves))
-        stats_data["p5_reserve"].append(np.percentile(year_reserves, 5))
-        stats_data["p95_reserve"].append(np.percentile(year_reserves, 95))
-        stats_data["mean_balance"].append(np.mean(year_balances))
-        stats_data["median_balance"].append(np.median(year_balances))
-        stats_data["p5_balance"].append(np.percentile(year_balances, 5))
-        stats_data["p95_balance"].append(np.percentile(year_balances, 95))
+    # 추정치의 표준오차 (분산감소/통제변량을 쓰면 mean_reserve는 그 추정치)
+    if "estimates" in rs:
+        estimates = rs["estimates"]
+        stats_data["mean_reserve"] = estimates["nominal_reserve_fund"]["mean"]
+        stats_data["mean_reserve_se"] = estimates["nominal_reserve_fund"][
+            "standard_error"
+        ]
+        stats_data["depletion_probability"] = estimates["depletion_probability"]["mean"]
+        stats_data["depletion_probability_se"] = estimates["depletion_probability"][
+            "standard_error"
+        ]
 
     # 통계 데이터 저장
     stats_df = pd.DataFrame(stats_data)
@@ -390,39 +390,31 @@ def save_stochastic_result_to_csv(rs, timestamp=None, title=""):
         index=False,
     )
 
-    # 각 시뮬레이션별 소진 연도 계산
-    depletion_years = []
-    for sim_idx, sim in enumerate(rs["financial_results"]):
-        depleted = False
-        for i in range(len(sim) - 1):
-            if (
-                sim[i]["nominal_reserve_fund"] > 0
-                and sim[i + 1]["nominal_reserve_fund"] <= 0
-            ):
-                depletion_years.append(
-                    {"simulation": sim_idx, "depletion_year": sim[i + 1]["year"]}
-                )
-                depleted = True
-                break
-
-        if not depleted:
-            # 소진되지 않은 경우
-            depletion_years.append({"simulation": sim_idx, "depletion_year": None})
-
-    depletion_df = pd.DataFrame(depletion_years)
+    # 각 시뮬레이션별 소진 연도 계산 (적립금이 양수에서 0 이하로 바뀐 첫 해)
+    depleted, depletion_idx = _find_depletion(reserves)
+    depletion_df = pd.DataFrame(
+        {
+            "simulation": results["simulation"],
+            "depletion_year": pd.Series(years[depletion_idx]).where(depleted),
+        }
+    )
+    if weights is not None:
+        depletion_df["likelihood_ratio"] = weights
     depletion_df.to_csv(
         f"csv/stochastic_depletion_years_{title}{timestamp}.csv",
         encoding="utf-8-sig",
         index=False,
     )
 
-    # 모든 시뮬레이션 결과를 저장
-    all_results = []
-    for sim_idx, sim in enumerate(rs["financial_results"]):
-        for result in sim:
-            result_copy = result.copy()
-            result_copy["simulation"] = sim_idx
-            all_results.append(result_copy)
+    # 모든 시뮬레이션 결과를 저장 (시뮬레이션 x 연도 -> 행)
+    n_sims, n_years = reserves.shape
+    all_results = {"year": np.tile(years, n_sims)}
+    for name, values in results.items():
+        if name not in ("year", "simulation", "likelihood_ratio"):
+            all_results[name] = np.ravel(values)
+    all_results["simulation"] = np.repeat(results["simulation"], n_years)
+    if weights is not None:
+        all_results["likelihood_ratio"] = np.repeat(weights, n_years)
 
     all_results_df = pd.DataFrame(all_results)
     all_results_df.to_csv(
@@ -432,47 +424,49 @@ def save_stochastic_result_to_csv(rs, timestamp=None, title=""):
     )
 
 
+def _find_depletion(reserves):
+    """(시뮬레이션, 연도) 적립금에서 양수 -> 0 이하로 바뀐 첫 연도 위치
+
+    반환값: (소진 여부, 소진 연도 인덱스) 시뮬레이션별 배열
+    """
+    crossing = (reserves[:, :-1] > 0) & (reserves[:, 1:] <= 0)
+    return crossing.any(axis=1), crossing.argmax(axis=1) + 1
+
+
 def create_stochastic_financial_plots(rs, timestamp=None, title=""):
     """확률적 시뮬레이션 결과 시각화"""
     if timestamp is None:
         timestamp = now.strftime("%d%H%M")
 
-    # 연도별 데이터 추출
-    years = sorted(
-        set([result["year"] for sim in rs["financial_results"] for result in sim])
-    )
-
-    # 적립금 데이터
-    reserve_data = {year: [] for year in years}
-    balance_data = {year: [] for year in years}
-
-    for sim in rs["financial_results"]:
-        for result in sim:
-            year = result["year"]
-            reserve_data[year].append(result["nominal_reserve_fund"])
-            balance_data[year].append(result["nominal_balance"])
+    # 연도별 데이터 추출 (결과는 항목별 (시뮬레이션, 연도) 행렬)
+    results = rs["financial_results"]
+    years = results["year"]
+    reserves = results["nominal_reserve_fund"]
+    balances = results["nominal_balance"]
+    weights = results.get("likelihood_ratio")  # 중요도 표본추출의 경로별 가중치
 
     # 연도별 통계 계산
-    mean_reserve = [np.mean(reserve_data[year]) for year in years]
-    median_reserve = [np.median(reserve_data[year]) for year in years]
-    p5_reserve = [np.percentile(reserve_data[year], 5) for year in years]
-    p95_reserve = [np.percentile(reserve_data[year], 95) for year in years]
+    mean_reserve = np.average(reserves, axis=0, weights=weights)
+    p5_reserve, median_reserve, p95_reserve = weighted_quantile(
+        reserves, [0.05, 0.5, 0.95], weights
+    )
 
     # 하위 5% 값들의 평균 계산
-    bottom_5_percent_means = []
-    for year in years:
-        values = reserve_data[year]
-        p5_threshold = np.percentile(values, 5)
-        bottom_5_percent_values = [v for v in values if v <= p5_threshold]
-        if bottom_5_percent_values:
-            bottom_5_percent_means.append(np.mean(bottom_5_percent_values))
-        else:
-            bottom_5_percent_means.append(p5_threshold)  # 값이 없으면 5% 임계값 사용
-
-    mean_balance = [np.mean(balance_data[year]) for year in years]
-    median_balance = [np.median(balance_data[year]) for year in years]
-    p5_balance = [np.percentile(balance_data[year], 5) for year in years]
-    p95_balance = [np.percentile(balance_data[year], 95) for year in years]
+    bottom_5_percent = reserves <= p5_reserve
+    if weights is None:
+        bottom_5_percent_means = np.nanmean(
+            np.where(bottom_5_percent, reserves, np.nan), axis=0
+        )
+    else:
+        bottom_weights = weights[:, np.newaxis] * bottom_5_percent
+        bottom_5_percent_means = (bottom_weights * reserves).sum(
+            axis=0
+        ) / bottom_weights.sum(axis=0)
+
+    mean_balance = np.average(balances, axis=0, weights=weights)
+    p5_balance, median_balance, p95_balance = weighted_quantile(
+        balances, [0.05, 0.5, 0.95], weights
+    )
 
     # 1. 적립금 추이 확률적 시각화
     plt.figure(figsize=(12, 8))
@@ -576,27 +570,25 @@ def create_stochastic_financial_plots(rs, timestamp=None, title=""):
     plt.close()
 
     # 3. 시뮬레이션별 적립금 소진 연도 분포
-    depletion_years = []
-
-    for sim_idx, sim in enumerate(rs["financial_results"]):
-        depleted = False
-        for i in range(len(sim) - 1):
-            if (
-                sim[i]["nominal_reserve_fund"] > 0
-                and sim[i + 1]["nominal_reserve_fund"] <= 0
-            ):
-                depletion_years.append(sim[i + 1]["year"])
-                depleted = True
-                break
-
-        if not depleted and sim[-1]["nominal_reserve_fund"] <= 0:
-            # 마지막 연도에 소진된 경우
-            depletion_years.append(sim[-1]["year"])
+    depleted, depletion_idx = _find_depletion(reserves)
+    # 마지막 연도까지 0 이하인 경우(처음부터 소진)는 마지막 연도로 집계
+    depleted_at_end = ~depleted & (reserves[:, -1] <= 0)
+    depletion_years = np.concatenate(
+        [years[depletion_idx[depleted]], np.repeat(years[-1], depleted_at_end.sum())]
+    ).tolist()
+    # 가중치는 합이 시뮬레이션 수가 되도록 맞춰 횟수와 같은 단위로 표시
+    depletion_weights = None
+    if weights is not None:
+        path_weights = weights * len(weights) / weights.sum()
+        depletion_weights = np.concatenate(
+            [path_weights[depleted], path_weights[depleted_at_end]]
+        )
 
     if depletion_years:  # 적립금이 소진된 시뮬레이션이 있는 경우만 그래프 생성
         plt.figure(figsize=(12, 6))
         plt.hist(
             depletion_years,
+            weights=depletion_weights,
             bins=range(min(depletion_years), max(depletion_years) + 2),
             alpha=0.7,
             color="orange",
@@ -638,19 +630,13 @@ def create_stochastic_financial_plots(rs, timestamp=None, title=""):
     # 랜덤하게 n개 시뮬레이션 선택하여 표시
     import random
 
-    selected_sims = random.sample(
-        range(len(rs["financial_results"])), min(100, len(rs["financial_results"]))
-    )
+    selected_sims = random.sample(range(len(reserves)), min(100, len(reserves)))
 
     colors = ["red", "blue", "green", "purple", "orange"]
     for i, sim_idx in enumerate(selected_sims):
-        sim = rs["financial_results"][sim_idx]
-        sim_years = [result["year"] for result in sim]
-        sim_reserves = [result["nominal_reserve_fund"] / 100000000 for result in sim]
-
         plt.plot(
-            sim_years,
-            sim_reserves,
+            years,
+            reserves[sim_idx] / 100000000,
             alpha=0.6,
             linewidth=1.5,
             color="gray",